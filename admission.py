@@ -0,0 +1,152 @@
+"""
+admission.py
+Admission control for the Smiley Calculator web app.
+Requests are charged a cost estimated from their operand digit count and run
+only while the total cost in flight fits a fixed capacity. Requests that do
+not fit wait in a bounded queue for a bounded time and are otherwise shed with
+503 Service Unavailable and a Retry-After estimate. Expensive requests share a
+smaller part of the capacity, so big operands cannot crowd out small ones, and
+operands beyond a digit limit are refused outright.
+
+Configured with SMILEY_MAX_CONCURRENCY, SMILEY_MAX_QUEUE, SMILEY_QUEUE_TIMEOUT
+and SMILEY_MAX_DIGITS; SMILEY_MAX_CONCURRENCY=0 turns admission control off.
+"""
+
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# Operand digits that cost one extra unit of capacity
+COST_UNIT_DIGITS = 1000
+
+# Weight of the newest observation in the moving average of seconds per cost unit
+SERVICE_TIME_SMOOTHING = 0.1
+
+
+class Overloaded(Exception):
+    """A request was shed because the server is at capacity."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TooExpensive(Exception):
+    """A request's operands exceed the digit limit."""
+
+
+class AdmissionController:
+    """Cost-weighted concurrency limiter with a bounded, time-limited wait queue."""
+
+    def __init__(self, capacity: int = 8, max_queue: int = 64, max_wait: float = 1.0, max_digits: int = 1_000_000):
+        """Allow capacity cost units in flight and up to max_queue waiters for max_wait seconds.
+
+        Requests costing more than one unit are expensive; together they may
+        use at most half of the capacity, which also caps a single request's cost.
+        A max_digits of 0 means no digit limit.
+        """
+        self.capacity = capacity
+        self.expensive_capacity = max(1, capacity // 2)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.max_digits = max_digits
+        self.in_use = 0
+        self.expensive_in_use = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self.unit_seconds = 0.001
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_environment(cls) -> Optional["AdmissionController"]:
+        """Build a controller from the SMILEY_* variables, or None when disabled."""
+        capacity = int(os.environ.get("SMILEY_MAX_CONCURRENCY", "8"))
+        if capacity <= 0:
+            return None
+        return cls(
+            capacity=capacity,
+            max_queue=int(os.environ.get("SMILEY_MAX_QUEUE", "64")),
+            max_wait=float(os.environ.get("SMILEY_QUEUE_TIMEOUT", "1.0")),
+            max_digits=int(os.environ.get("SMILEY_MAX_DIGITS", "1000000")),
+        )
+
+    def estimate_cost(self, digits: int) -> int:
+        """Return the cost of a request with this many operand digits."""
+        if self.max_digits and digits > self.max_digits:
+            raise TooExpensive(f"Operands too large: {digits:,} digits (limit {self.max_digits:,})")
+        return min(1 + digits // COST_UNIT_DIGITS, self.expensive_capacity)
+
+    def _fits(self, cost: int) -> bool:
+        """Whether a request of this cost can start now."""
+        if self.in_use + cost > self.capacity:
+            return False
+        return cost == 1 or self.expensive_in_use + cost <= self.expensive_capacity
+
+    def retry_after(self) -> int:
+        """Estimate in whole seconds how long the queued and running work takes to drain."""
+        backlog = self.in_use + self.waiting * self.expensive_capacity
+        return max(1, math.ceil(backlog * self.unit_seconds / self.capacity))
+
+    @contextmanager
+    def admit(self, digits: int) -> Iterator[int]:
+        """Hold capacity for a request with this many operand digits, or raise Overloaded."""
+        cost = self.estimate_cost(digits)
+        with self._condition:
+            if not self._fits(cost):
+                if self.waiting >= self.max_queue:
+                    self.shed += 1
+                    raise Overloaded("Server busy: too many requests waiting", self.retry_after())
+                self.waiting += 1
+                try:
+                    admitted = self._condition.wait_for(lambda: self._fits(cost), self.max_wait)
+                finally:
+                    self.waiting -= 1
+                if not admitted:
+                    self.shed += 1
+                    raise Overloaded("Server busy: request waited too long", self.retry_after())
+            self.in_use += cost
+            if cost > 1:
+                self.expensive_in_use += cost
+            self.admitted += 1
+
+        started = time.perf_counter()
+        try:
+            yield cost
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._condition:
+                self.in_use -= cost
+                if cost > 1:
+                    self.expensive_in_use -= cost
+                self.unit_seconds += SERVICE_TIME_SMOOTHING * (elapsed / cost - self.unit_seconds)
+                self._condition.notify_all()
+
+    def stats(self) -> dict:
+        """Return the current load and lifetime counters."""
+        with self._condition:
+            return {
+                "capacity": self.capacity,
+                "in_use": self.in_use,
+                "waiting": self.waiting,
+                "admitted": self.admitted,
+                "shed": self.shed,
+            }
+
+
+def operand_digits(data, *fields: str) -> int:
+    """Estimate the total digit count of the given fields of a JSON request."""
+    if not isinstance(data, dict):
+        return 0
+    digits = 0
+    for field in fields:
+        value = data.get(field)
+        if type(value) is int:
+            # Avoids str(), which is quadratic and limited to 4300 digits for ints
+            digits += math.ceil(value.bit_length() * math.log10(2)) or 1
+        elif value is not None:
+            digits += len(str(value))
+    return digits
@@ -5,93 +5,494 @@ Flask web application for the Smiley Calculator
 Provides a beautiful web interface with clickable smiley buttons
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 import json
+import os
+import threading
+import metrics
+import profiling
+from admission import AdmissionController, Overloaded, TooExpensive, operand_digits
 from calculator import SmileyCalculator
+from channel import MAX_BATCH, ChannelHub
+from history import HistoryStore
+from pages import PrerenderedPage
+from reductions import REDUCTIONS
+from smiley_codec import BIG_NUMBER_BITS, alphabet_names, get_codec, number_to_text
 
 app = Flask(__name__)
-calc = SmileyCalculator()
 
+# Memoize conversions and calculations; set SMILEY_CACHE_SIZE=0 to disable
+CACHE_SIZE = int(os.environ.get("SMILEY_CACHE_SIZE", "4096"))
+calc = SmileyCalculator(cache_size=CACHE_SIZE)
 
-@app.route("/")
-def index():
-    """Main page with the calculator interface."""
-    return render_template(
+# Set SMILEY_CACHE_TOKEN to allow DELETE /api/cache with an "Authorization: Bearer <token>" header
+CACHE_TOKEN = os.environ.get("SMILEY_CACHE_TOKEN", "")
+
+# One calculator per requested alphabet, created on first use; compiled codecs are shared
+calculators = {calc.alphabet: calc}
+calculators_lock = threading.Lock()
+
+# Admission control in front of /calculate and /api/convert; SMILEY_MAX_CONCURRENCY=0 turns it off
+admission = AdmissionController.from_environment()
+
+# Set SMILEY_HISTORY_DB to a SQLite file path to keep an audit trail of calculations
+history = HistoryStore(os.environ["SMILEY_HISTORY_DB"]) if os.environ.get("SMILEY_HISTORY_DB") else None
+
+
+def calculator_for(alphabet) -> SmileyCalculator:
+    """Return the calculator for a registered alphabet name (None means the default)."""
+    if not alphabet:
+        return calc
+    calculator = calculators.get(alphabet)
+    if calculator is None:
+        with calculators_lock:
+            calculator = calculators.get(alphabet)
+            if calculator is None:
+                calculator = SmileyCalculator(cache_size=CACHE_SIZE, alphabet=alphabet)
+                if metrics.registry is not None:
+                    metrics.instrument_calculator(calculator)
+                calculators[alphabet] = calculator
+    return calculator
+
+
+def admitted_payload(build_payload, data, *operand_fields: str):
+    """Build a payload under admission control; return (payload, status, headers), shedding load with 503 or 413."""
+    if admission is None:
+        return build_payload(data), 200, {}
+    try:
+        with admission.admit(operand_digits(data, *operand_fields)):
+            return build_payload(data), 200, {}
+    except Overloaded as e:
+        metrics.record_error(e)
+        return {"success": False, "error": str(e)}, 503, {"Retry-After": str(e.retry_after)}
+    except TooExpensive as e:
+        metrics.record_error(e)
+        return {"success": False, "error": str(e)}, 413, {}
+
+
+def admitted_json(build_payload, data, *operand_fields: str):
+    """Build a JSON response under admission control, shedding load with 503 or 413."""
+    payload, status, headers = admitted_payload(build_payload, data, *operand_fields)
+    return jsonify(payload), status, headers
+
+
+def json_number(value):
+    """Return a regular value for JSON; ints beyond BIG_NUMBER_BITS bits become decimal digit strings.
+
+    str() and the JSON encoder refuse ints past 4300 digits, so large values
+    are sent as strings rather than failing the whole response.
+    """
+    if type(value) is int and abs(value).bit_length() > BIG_NUMBER_BITS:
+        return number_to_text(value)
+    return value
+
+
+def json_calculation(calculation: dict) -> dict:
+    """Return a calculate_detailed() result with its regular values made safe for JSON."""
+    return {key: json_number(value) if key.endswith("_regular") else value for key, value in calculation.items()}
+
+
+def record_history(operation, num1=None, num2=None, result=None, error=None):
+    """Queue a served calculation for the history store, if enabled."""
+    if history is not None:
+        history.record(operation, num1, num2, result, error)
+
+
+# The page inputs never change after startup, so each page is rendered and compressed once
+index_page = PrerenderedPage(
+    lambda: render_template(
         "index.html",
         numbers=calc.numbers,
         operations=calc.operations,
         reverse_numbers=calc.reverse_numbers,
         reverse_operations=calc.reverse_operations,
     )
+)
+help_page_html = PrerenderedPage(lambda: render_template("help.html", numbers=calc.numbers, operations=calc.operations))
+
+
+@app.route("/")
+def index():
+    """Main page with the calculator interface."""
+    return index_page.response()
 
 
 @app.route("/calculate", methods=["POST"])
 def calculate():
     """Handle calculation requests."""
     try:
-        data = request.json
+        return admitted_json(calculation_payload, request.json, "num1", "num2")
+    except Exception as e:
+        metrics.record_error(e)
+        return jsonify({"success": False, "error": str(e)})
+
+
+def calculation_payload(data: dict) -> dict:
+    """Build the /calculate response for a parsed JSON request."""
+    operation = data.get("operation", "") if isinstance(data, dict) else None
+    # History name of a failed calculation; the operation may be any JSON value
+    operation_name = calc.operations.get(operation, operation) if isinstance(operation, str) else str(operation)
+    num1 = num2 = None
+    try:
         num1 = data.get("num1", "")
-        operation = data.get("operation", "")
         num2 = data.get("num2", "")
 
         if not num1 or not operation or not num2:
-            return jsonify({"success": False, "error": "Please enter both numbers and select an operation"})
+            return {"success": False, "error": "Please enter both numbers and select an operation"}
 
-        # Perform calculation
-        result = calc.calculate(num1, operation, num2)
+        # Perform calculation; the regular numbers for display come from the same pass
+        calculation = calculator_for(data.get("alphabet")).calculate_detailed(num1, operation, num2)
+        record_history(calculation["operation_name"], num1, num2, calculation["result"])
 
-        # Convert to regular numbers for display
-        num1_regular = calc.smiley_to_number(num1)
-        num2_regular = calc.smiley_to_number(num2)
-        result_regular = calc.smiley_to_number(result)
-        op_name = calc.operations[operation]
+        return {"success": True, "result": calculation["result"], "calculation": json_calculation(calculation)}
+
+    except Exception as e:
+        metrics.record_error(e)
+        record_history(operation_name, num1, num2, error=str(e))
+        return {"success": False, "error": str(e)}
+
+
+@app.route("/api/calculate/batch", methods=["POST"])
+def calculate_batch():
+    """Handle many calculation requests in a single round trip."""
+    try:
+        data = request.json
+        calculations = data.get("calculations")
+        if not isinstance(calculations, list):
+            return jsonify({"success": False, "error": "Please provide a list of calculations"})
+
+        triples = []
+        missing = set()
+        for index, item in enumerate(calculations):
+            num1 = item.get("num1", "") if isinstance(item, dict) else ""
+            operation = item.get("operation", "") if isinstance(item, dict) else ""
+            num2 = item.get("num2", "") if isinstance(item, dict) else ""
+            if not num1 or not operation or not num2:
+                missing.add(index)
+            triples.append((num1, operation, num2))
+
+        results, errors = calc.calculate_batch([triple for index, triple in enumerate(triples) if index not in missing])
+        outcomes = iter(zip(results, errors))
+
+        items = []
+        for index in range(len(triples)):
+            if index in missing:
+                items.append({"success": False, "error": "Please enter both numbers and select an operation"})
+                continue
+            result, error = next(outcomes)
+            if error is None:
+                items.append({"success": True, "result": result})
+            else:
+                items.append({"success": False, "error": error})
+
+        return jsonify({"success": True, "results": items})
+
+    except Exception as e:
+        metrics.record_error(e)
+        return jsonify({"success": False, "error": str(e)})
+
+
+@app.route("/api/calculate/stream", methods=["POST"])
+def calculate_stream():
+    """Evaluate newline-delimited JSON calculations as they arrive and stream NDJSON results back.
+
+    Each line holds either {"num1", "operation", "num2"} or {"expression"}.
+    A bad line produces an error record for that line only.
+    """
+
+    def generate():
+        line_number = 0
+        for line in request.stream:
+            line_number += 1
+            if not line.strip():
+                continue
+            yield json.dumps(stream_record(line, line_number)) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+def stream_record(line: bytes, line_number: int) -> dict:
+    """Evaluate one NDJSON calculation line and return its result record."""
+    try:
+        data = json.loads(line)
+        if not isinstance(data, dict):
+            raise ValueError("Each line must be a JSON object")
+
+        if "expression" in data:
+            result = calc.evaluate(data["expression"])
+        else:
+            num1 = data.get("num1", "")
+            operation = data.get("operation", "")
+            num2 = data.get("num2", "")
+            if not num1 or not operation or not num2:
+                raise ValueError("Please enter both numbers and select an operation")
+            result = calc.calculate(num1, operation, num2)
+
+        return {"line": line_number, "success": True, "result": result}
+
+    except Exception as e:
+        metrics.record_error(e)
+        return {"line": line_number, "success": False, "error": str(e)}
+
+
+@app.route("/api/reduce", methods=["POST"])
+def reduce_numbers():
+    """Reduce a streamed list of smiley numbers, one per line, in a single pass.
+
+    Query parameters: operations (comma-separated names from sum, product,
+    mean, min, max and variance; all by default) and alphabet. The body is
+    consumed as it arrives and never held in memory.
+    """
+    position = {"line": 0, "count": 0}
+
+    def numbers():
+        for line in request.stream:
+            position["line"] += 1
+            smiley = line.decode("utf-8").strip()
+            if smiley:
+                position["count"] += 1
+                yield smiley
+
+    try:
+        operations = request.args.get("operations")
+        results = calculator_for(request.args.get("alphabet")).aggregate(
+            numbers(), operations.split(",") if operations else REDUCTIONS
+        )
+        return jsonify({"success": True, "count": position["count"], "results": results})
+
+    except Exception as e:
+        metrics.record_error(e)
+        error = f"{e} (line {position['line']})" if position["line"] else str(e)
+        return jsonify({"success": False, "error": error})
+
+
+@app.route("/api/evaluate", methods=["POST"])
+def evaluate_expression():
+    """Evaluate a whole smiley expression with precedence and parentheses."""
+    try:
+        data = request.json
+        expression = data.get("expression", "")
+
+        if not expression:
+            return jsonify({"success": False, "error": "Please enter an expression"})
+
+        result_regular = calc.expressions.evaluate(expression)
 
         return jsonify(
             {
                 "success": True,
-                "result": result,
-                "calculation": {
-                    "num1": num1,
-                    "operation": operation,
-                    "num2": num2,
-                    "result": result,
-                    "num1_regular": num1_regular,
-                    "num2_regular": num2_regular,
-                    "result_regular": result_regular,
-                    "operation_name": op_name,
-                },
+                "result": calc.number_to_smiley(result_regular),
+                "expression": expression,
+                "result_regular": json_number(result_regular),
             }
         )
 
     except Exception as e:
+        metrics.record_error(e)
         return jsonify({"success": False, "error": str(e)})
 
 
 @app.route("/help")
 def help_page():
     """Help page with smiley guide."""
-    return render_template("help.html", numbers=calc.numbers, operations=calc.operations)
+    return help_page_html.response()
 
 
 @app.route("/api/convert", methods=["POST"])
 def convert_number():
     """Convert between smiley and regular numbers."""
     try:
-        data = request.json
+        return admitted_json(conversion_payload, request.json, "smiley", "number")
+    except Exception as e:
+        metrics.record_error(e)
+        return jsonify({"success": False, "error": str(e)})
+
+
+def conversion_payload(data: dict) -> dict:
+    """Build the /api/convert response for a parsed JSON request."""
+    try:
+        calculator = calculator_for(data.get("alphabet"))
         if "smiley" in data:
             # Convert smiley to number
-            number = calc.smiley_to_number(data["smiley"])
-            return jsonify({"success": True, "number": number})
+            number = calculator.smiley_to_number(data["smiley"])
+            record_history("convert", data["smiley"], result=number)
+            return {"success": True, "number": json_number(number)}
         elif "number" in data:
             # Convert number to smiley
-            smiley = calc.number_to_smiley(data["number"])
-            return jsonify({"success": True, "smiley": smiley})
+            smiley = calculator.number_to_smiley(data["number"])
+            record_history("convert", data["number"], result=smiley)
+            return {"success": True, "smiley": smiley}
         else:
-            return jsonify({"success": False, "error": "Invalid input"})
+            return {"success": False, "error": "Invalid input"}
+    except Exception as e:
+        metrics.record_error(e)
+        record_history("convert", data.get("smiley", data.get("number")) if isinstance(data, dict) else None, error=str(e))
+        return {"success": False, "error": str(e)}
+
+
+def preview_payload(data: dict) -> dict:
+    """Build a live preview of partly entered input; previews are not kept in the history.
+
+    Once both numbers and the operation are present the preview is the full
+    calculation, before that the regular values of the numbers entered so far.
+    """
+    try:
+        calculator = calculator_for(data.get("alphabet"))
+        num1 = data.get("num1", "")
+        operation = data.get("operation", "")
+        num2 = data.get("num2", "")
+        if num1 and operation and num2:
+            return {"success": True, "calculation": json_calculation(calculator.calculate_detailed(num1, operation, num2))}
+        preview = {}
+        if num1:
+            preview["num1_regular"] = calculator.smiley_to_number(num1)
+        if operation:
+            preview["operation_name"] = calculator.get_operation_function(operation).__name__
+        if num2:
+            preview["num2_regular"] = calculator.smiley_to_number(num2)
+        return {"success": True, "calculation": json_calculation(preview)}
     except Exception as e:
+        metrics.record_error(e)
+        return {"success": False, "error": str(e)}
+
+
+@app.route("/api/alphabets")
+def alphabets():
+    """List the digit alphabets that /calculate and /api/convert accept."""
+    return jsonify({
+        "success": True,
+        "default": calc.alphabet,
+        "alphabets": {name: {"base": get_codec(name).base, "digits": "".join(get_codec(name).digit_smileys)} for name in alphabet_names()},
+    })
+
+
+@app.route("/api/cache", methods=["GET", "DELETE"])
+def cache_stats():
+    """Report memoization cache counters, or clear every calculator's cache with an authorized DELETE."""
+    if request.method == "DELETE":
+        if not CACHE_TOKEN:
+            return jsonify({"success": False, "error": "Clearing the cache is disabled"}), 403
+        if not profiling.authorized(request.headers.get("Authorization", ""), CACHE_TOKEN):
+            return jsonify({"success": False, "error": "Unauthorized"}), 401, {"WWW-Authenticate": "Bearer"}
+        with calculators_lock:
+            cached = list(calculators.values())
+        for calculator in cached:
+            calculator.clear_cache()
+    stats = calc.cache_stats()
+    if stats is None:
+        return jsonify({"success": False, "error": "Caching is disabled"})
+    return jsonify({"success": True, "cache": stats})
+
+
+@app.route("/api/history")
+def history_page():
+    """Return one keyset-paginated page of the calculation history.
+
+    Query parameters: start and end (Unix seconds), operation (e.g. add or
+    convert), cursor (from the previous page) and limit.
+    """
+    if history is None:
+        return jsonify({"success": False, "error": "History is disabled"})
+    try:
+        args = request.args
+        items, next_cursor = history.query(
+            start=args.get("start", type=float),
+            end=args.get("end", type=float),
+            operation=args.get("operation"),
+            cursor=args.get("cursor"),
+            limit=args.get("limit", default=100, type=int),
+        )
+        return jsonify({"success": True, "items": items, "next_cursor": next_cursor})
+    except Exception as e:
+        metrics.record_error(e)
         return jsonify({"success": False, "error": str(e)})
 
 
+# Open result streams of this process for the page's persistent channel
+channels = ChannelHub()
+
+# Payload builder and operand fields (for admission control) of each channel message type
+CHANNEL_MESSAGES = {
+    "calculate": (calculation_payload, ("num1", "num2")),
+    "convert": (conversion_payload, ("smiley", "number")),
+    "preview": (preview_payload, ("num1", "num2")),
+}
+
+
+@app.route("/channel")
+def open_channel():
+    """Open a Server-Sent Events stream carrying the results of messages posted to the channel.
+
+    The first event, "ready", names the channel; each result is a message
+    event tagged with the id of the message it answers.
+    """
+    try:
+        channel = channels.open()
+    except Overloaded as e:
+        metrics.record_error(e)
+        return jsonify({"success": False, "error": str(e)}), 503, {"Retry-After": str(e.retry_after)}
+
+    def generate():
+        try:
+            yield from channel.stream()
+        finally:
+            channels.close(channel.id)
+
+    return Response(generate(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route("/channel/<channel_id>", methods=["POST"])
+def post_to_channel(channel_id):
+    """Evaluate one message or a list of messages and send the results on the channel's stream.
+
+    Each message has an "id", echoed with its result, a "type" (calculate,
+    convert or preview) and that request's fields. The reply is an empty 202;
+    if the channel is not open in this process (another production worker
+    holds it) the results are returned in the response body instead.
+    """
+    messages = request.get_json(silent=True)
+    if isinstance(messages, dict):
+        messages = [messages]
+    if not isinstance(messages, list) or len(messages) > MAX_BATCH:
+        return jsonify({"success": False, "error": f"Please send a message or a list of up to {MAX_BATCH} messages"}), 400
+
+    results = [channel_result(message) for message in messages]
+    channel = channels.get(channel_id)
+    if channel is None:
+        return jsonify({"success": True, "results": results})
+    for result in results:
+        channel.publish(result)
+    return "", 202
+
+
+def channel_result(message) -> dict:
+    """Evaluate one channel message and return its result tagged with the message id and type."""
+    if not isinstance(message, dict):
+        return {"id": None, "success": False, "error": "Each message must be a JSON object"}
+    kind = message.get("type", "calculate")
+    handler = CHANNEL_MESSAGES.get(kind)
+    if handler is None:
+        payload = {"success": False, "error": f"Unknown message type: {kind}"}
+    else:
+        build_payload, operand_fields = handler
+        try:
+            payload, _, _ = admitted_payload(build_payload, message, *operand_fields)
+        except Exception as e:
+            # One bad message must not lose the results of the rest of its batch
+            metrics.record_error(e)
+            payload = {"success": False, "error": str(e)}
+    return {"id": message.get("id"), "type": kind, **payload}
+
+
+# Set SMILEY_METRICS=1 to expose Prometheus metrics at /metrics
+if metrics.ENABLED:
+    metrics.install(app, calc)
+
+# Set SMILEY_PROFILE and/or SMILEY_PROFILE_TOKEN to profile requests (see profiling.py)
+if profiling.ENABLED:
+    profiling.install(app)
+
+
 if __name__ == "__main__":
     print("🚀 Starting Smiley Calculator Web App...")
     print("🌐 Open your browser and go to: http://127.0.0.1:5000")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+asgi_app.py
+Asyncio-native ASGI version of the Smiley Calculator web app.
+Serves the same routes as app.py (/, /calculate, /help, /api/convert) with
+identical JSON responses and the same SmileyCalculator instance, without
+tying up a worker per slow client. Calculations with big operands run in a
+thread pool so they do not block the event loop.
+
+Run with: python asgi_app.py  (requires: pip install uvicorn)
+"""
+
+import asyncio
+import json
+from typing import Awaitable, Callable, Dict, Tuple
+
+from app import app as flask_app, calc, calculation_payload, conversion_payload
+
+# Requests whose JSON body is larger than this many bytes are computed in the executor
+OFFLOAD_BODY_BYTES = 4096
+
+HTML_HEADERS = [(b"content-type", b"text/html; charset=utf-8")]
+JSON_HEADERS = [(b"content-type", b"application/json")]
+
+
+def render_page(template: str, **context) -> bytes:
+    """Render one of the Flask app's templates."""
+    return flask_app.jinja_env.get_template(template).render(**context).encode("utf-8")
+
+
+def json_body(payload: dict) -> bytes:
+    """Serialize a payload exactly like Flask's jsonify."""
+    return (flask_app.json.dumps(payload, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+async def read_body(receive: Callable[[], Awaitable[dict]]) -> bytes:
+    """Read the full request body from the ASGI receive channel."""
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+async def json_route(body: bytes, build_payload: Callable[[dict], dict]) -> Tuple[int, list, bytes]:
+    """Run a JSON API handler, off the event loop when the operands are big."""
+    try:
+        data = json.loads(body)
+    except ValueError as e:
+        return 200, JSON_HEADERS, json_body({"success": False, "error": f"400 Bad Request: {e}"})
+
+    if len(body) > OFFLOAD_BODY_BYTES:
+        payload = await asyncio.get_running_loop().run_in_executor(None, build_payload, data)
+    else:
+        payload = build_payload(data)
+    return 200, JSON_HEADERS, json_body(payload)
+
+
+async def index(body: bytes) -> Tuple[int, list, bytes]:
+    """Main page with the calculator interface."""
+    page = render_page(
+        "index.html",
+        numbers=calc.numbers,
+        operations=calc.operations,
+        reverse_numbers=calc.reverse_numbers,
+        reverse_operations=calc.reverse_operations,
+    )
+    return 200, HTML_HEADERS, page
+
+
+async def help_page(body: bytes) -> Tuple[int, list, bytes]:
+    """Help page with smiley guide."""
+    return 200, HTML_HEADERS, render_page("help.html", numbers=calc.numbers, operations=calc.operations)
+
+
+async def calculate(body: bytes) -> Tuple[int, list, bytes]:
+    """Handle calculation requests."""
+    return await json_route(body, calculation_payload)
+
+
+async def convert_number(body: bytes) -> Tuple[int, list, bytes]:
+    """Convert between smiley and regular numbers."""
+    return await json_route(body, conversion_payload)
+
+
+ROUTES: Dict[str, Tuple[str, Callable[[bytes], Awaitable[Tuple[int, list, bytes]]]]] = {
+    "/": ("GET", index),
+    "/help": ("GET", help_page),
+    "/calculate": ("POST", calculate),
+    "/api/convert": ("POST", convert_number),
+}
+
+
+async def application(scope: dict, receive: Callable, send: Callable):
+    """ASGI entry point."""
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+
+    route = ROUTES.get(scope["path"])
+    method = scope["method"]
+    if route is None:
+        status, headers, body = 404, HTML_HEADERS, b"<h1>Not Found</h1>"
+    elif method != route[0] and not (method == "HEAD" and route[0] == "GET"):
+        status, headers, body = 405, HTML_HEADERS + [(b"allow", route[0].encode())], b"<h1>Method Not Allowed</h1>"
+    else:
+        status, headers, body = await route[1](await read_body(receive))
+
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": headers + [(b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body if method != "HEAD" else b""})
+
+
+if __name__ == "__main__":
+    try:
+        import uvicorn
+    except ImportError:
+        print("❌ 'uvicorn' not found. Install with: pip install uvicorn")
+        raise SystemExit(1)
+
+    print("🚀 Starting Smiley Calculator ASGI App...")
+    print("🌐 Open your browser and go to: http://127.0.0.1:8000")
+    uvicorn.run(application, host="127.0.0.1", port=8000, log_level="warning")
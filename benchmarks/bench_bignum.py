@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+bench_bignum.py
+Scaling benchmark for converting huge smiley integers in both directions.
+Prints the time per size, the growth exponent between consecutive sizes and
+the time normalized by n*log2(n), which stays roughly flat for near-linearithmic
+growth, then the exponent fitted over the larger sizes and what limits it.
+The plain int()/str() conversion is shown for comparison.
+
+Only encoding is near-linearithmic: decoding builds a binary int, and the
+big multiplications that join its halves use CPython's Karatsuba
+algorithm, so it grows towards n^1.58.
+
+Usage: python benchmarks/bench_bignum.py [--max-digits 1000000] [--naive-limit 100000]
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calculator import SmileyCalculator
+
+# Smallest size used to fit the growth exponent; below it fixed overheads dominate
+FIT_MIN_DIGITS = 10_000
+
+# What bounds the growth of each direction, printed with the fitted exponents
+SCALING_LIMITS = {
+    "decode": "halves are joined with CPython's Karatsuba int multiply, so growth tends to n^1.58, not n log n",
+    "encode": "halves are joined with libmpdec's number-theoretic-transform multiply, so growth stays near n log n",
+}
+
+
+def timed(func) -> float:
+    """Return the wall time of a single call in seconds."""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def fitted_exponent(points) -> float:
+    """Least-squares slope of log(time) against log(size)."""
+    xs = [math.log(size) for size, _ in points]
+    ys = [math.log(elapsed) for _, elapsed in points]
+    x_mean, y_mean = sum(xs) / len(xs), sum(ys) / len(ys)
+    return sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / sum((x - x_mean) ** 2 for x in xs)
+
+
+def main():
+    """Run the scaling benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-digits", type=int, default=1_000_000)
+    parser.add_argument("--naive-limit", type=int, default=100_000, help="largest size for the plain int()/str() baseline")
+    args = parser.parse_args()
+
+    if hasattr(sys, "set_int_max_str_digits"):
+        sys.set_int_max_str_digits(0)
+
+    calc = SmileyCalculator(big_numbers=True)
+    digits = list(calc.numbers)
+
+    sizes = []
+    size = 1_000
+    while size <= args.max_digits:
+        sizes.append(size)
+        size = size * 10 // 4 if str(size)[0] == "4" else size * 2
+
+    print(f"{'digits':>9} {'direction':>9} {'time':>10} {'growth':>7} {'ns/(n log n)':>13} {'int()/str()':>12}")
+    previous = {}
+    timings = {"decode": [], "encode": []}
+    for size in sizes:
+        smiley_string = "".join(digits[(i * 7 + 3) % 10] for i in range(size))
+        number = calc.smiley_to_number(smiley_string)
+        plain_digits = str(number) if size <= args.naive_limit else None
+
+        for direction, func, naive in (
+            ("decode", lambda: calc.smiley_to_number(smiley_string), lambda: int(plain_digits)),
+            ("encode", lambda: calc.number_to_smiley(number), lambda: str(number)),
+        ):
+            elapsed = timed(func)
+            normalized = elapsed * 1e9 / (size * math.log2(size))
+            growth = "-"
+            if direction in previous:
+                previous_size, previous_time = previous[direction]
+                growth = f"{math.log(elapsed / previous_time) / math.log(size / previous_size):.2f}"
+            previous[direction] = (size, elapsed)
+            timings[direction].append((size, elapsed))
+            naive_time = f"{timed(naive) * 1e3:.1f}ms" if plain_digits is not None else "skipped"
+            print(f"{size:>9} {direction:>9} {elapsed * 1e3:>8.1f}ms {growth:>7} {normalized:>13.2f} {naive_time:>12}")
+
+    print()
+    for direction, points in timings.items():
+        fitted = [point for point in points if point[0] >= FIT_MIN_DIGITS]
+        if len(fitted) < 2:
+            fitted = points
+        if len(fitted) >= 2:
+            print(f"{direction}: fitted growth exponent {fitted_exponent(fitted):.2f} ({SCALING_LIMITS[direction]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+bench_codec.py
+Micro-benchmark of the table-driven smiley codec against the original
+per-character decoding and encoding loops.
+
+Usage: python benchmarks/bench_codec.py [--sizes 10 1000 1000000]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calculator import SmileyCalculator
+
+# The per-character loops are quadratic, so they are skipped above this many digits
+LEGACY_DIGIT_LIMIT = 100_000
+
+
+def legacy_decode(calc: SmileyCalculator, smiley_string: str) -> int:
+    """Original _convert_smiley_digits loop."""
+    result = 0
+    for smiley in smiley_string:
+        if smiley in calc.numbers:
+            result = result * 10 + calc.numbers[smiley]
+        elif smiley != '.':
+            raise ValueError(f"Unknown smiley digit: {smiley}")
+    return result
+
+
+def legacy_encode(calc: SmileyCalculator, number: int) -> str:
+    """Original number_to_smiley loop."""
+    smiley_result = ""
+    for char in str(number):
+        if char.isdigit():
+            smiley_result += calc.reverse_numbers[int(char)]
+        elif char == '.':
+            smiley_result += '.'
+        elif char == '-':
+            smiley_result += '➖'
+    return smiley_result
+
+
+def best_time(func, repeat: int) -> float:
+    """Return the best per-call time in seconds over a few runs."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange() if repeat > 1 else (1, None)
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def main():
+    """Run the codec benchmark and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1_000, 1_000_000])
+    args = parser.parse_args()
+
+    # The benchmark measures the codec itself, not the interpreter's conversion limit
+    if hasattr(sys, "set_int_max_str_digits"):
+        sys.set_int_max_str_digits(0)
+
+    calc = SmileyCalculator()
+    digits = list(calc.numbers)
+
+    print(f"{'digits':>10} {'direction':>9} {'legacy':>12} {'codec':>12} {'speedup':>9}")
+    for size in args.sizes:
+        smiley_string = "".join(digits[(i * 7 + 1) % 10] for i in range(size))
+        number = calc.smiley_to_number(smiley_string)
+        repeat = 5 if size <= 10_000 else 1
+
+        for direction, legacy, codec in (
+            ("decode", lambda: legacy_decode(calc, smiley_string), lambda: calc.smiley_to_number(smiley_string)),
+            ("encode", lambda: legacy_encode(calc, number), lambda: calc.number_to_smiley(number)),
+        ):
+            codec_time = best_time(codec, repeat)
+            if size <= LEGACY_DIGIT_LIMIT:
+                legacy_time = best_time(legacy, repeat)
+                print(f"{size:>10} {direction:>9} {legacy_time * 1e6:>10.1f}us {codec_time * 1e6:>10.1f}us {legacy_time / codec_time:>8.1f}x")
+            else:
+                print(f"{size:>10} {direction:>9} {'skipped':>12} {codec_time * 1e6:>10.1f}us {'-':>9}")
+
+
+if __name__ == "__main__":
+    main()
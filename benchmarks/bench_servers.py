@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+bench_servers.py
+Compare the Flask app (app.py) with the ASGI app (asgi_app.py) under 1, 64 and
+1 024 concurrent keep-alive connections sending POST /calculate.
+Both servers are started as subprocesses unless --flask-url/--asgi-url point
+at already running ones. Requires uvicorn for the ASGI server.
+
+Usage: python benchmarks/bench_servers.py [--duration 5] [--concurrency 1 64 1024]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+REQUEST_BODY = json.dumps({"num1": "😊😀", "operation": "✖️", "num2": "😁😄"}).encode("utf-8")
+
+
+async def connection_worker(host: str, port: int, deadline: float, latencies: list, errors: list):
+    """Send requests over one keep-alive connection until the deadline."""
+    request = (
+        f"POST /calculate HTTP/1.1\r\nHost: {host}:{port}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(REQUEST_BODY)}\r\n\r\n"
+    ).encode("ascii") + REQUEST_BODY
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            started = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            headers = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").lower()
+            length = int(headers.split("content-length:", 1)[1].split("\r\n", 1)[0])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+            if "connection: close" in headers or headers.startswith("http/1.0"):
+                writer.close()
+                writer = None
+        except (OSError, asyncio.IncompleteReadError, IndexError, ValueError) as e:
+            errors.append(type(e).__name__)
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.01)
+    if writer is not None:
+        writer.close()
+
+
+async def run_level(url: str, concurrency: int, duration: float) -> dict:
+    """Drive one server at one concurrency level and summarize the latencies."""
+    parts = urlsplit(url)
+    latencies, errors = [], []
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(
+        connection_worker(parts.hostname, parts.port, deadline, latencies, errors) for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def percentile(fraction: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1e3 if latencies else 0.0
+
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(0.50),
+        "p99_ms": percentile(0.99),
+    }
+
+
+def wait_for(url: str, timeout: float = 15.0):
+    """Wait until a server accepts connections."""
+    parts = urlsplit(url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            asyncio.run(asyncio.wait_for(asyncio.open_connection(parts.hostname, parts.port), 1))
+            return
+        except (OSError, asyncio.TimeoutError):
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+def main():
+    """Start the servers, run every concurrency level and print a comparison."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 64, 1024])
+    parser.add_argument("--flask-url", help="use a running Flask server instead of starting app.py")
+    parser.add_argument("--asgi-url", help="use a running ASGI server instead of starting uvicorn")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    servers = []
+    targets = {"flask": args.flask_url, "asgi": args.asgi_url}
+    if targets["flask"] is None:
+        servers.append(subprocess.Popen([sys.executable, "app.py"], cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+        targets["flask"] = "http://127.0.0.1:5000"
+    if targets["asgi"] is None:
+        servers.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "asgi_app:application", "--port", "8000", "--log-level", "warning", "--backlog", "2048"],
+            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        ))
+        targets["asgi"] = "http://127.0.0.1:8000"
+
+    results = {}
+    try:
+        for name, url in targets.items():
+            wait_for(url)
+            for concurrency in args.concurrency:
+                results.setdefault(name, {})[concurrency] = asyncio.run(run_level(url, concurrency, args.duration))
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'server':>6} {'conns':>6} {'req/s':>10} {'p50':>10} {'p99':>10} {'errors':>7}")
+    for name, levels in results.items():
+        for concurrency, stats in levels.items():
+            print(f"{name:>6} {concurrency:>6} {stats['rps']:>10.0f} {stats['p50_ms']:>8.2f}ms {stats['p99_ms']:>8.2f}ms {stats['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+run_benchmarks.py
+Reproducible benchmark suite for the Smiley Calculator with regression gates.
+Times the codec, calculate(), get_help_text() and the Flask routes (through the
+test client) at several operand sizes, optionally saves the results as a JSON
+baseline, and exits with status 1 when a case is slower than its baseline by
+more than the threshold.
+
+Usage:
+    python benchmarks/run_benchmarks.py --save benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json --threshold 0.25
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calculator import SmileyCalculator
+
+# Operand sizes in smiley digits
+SIZES = (1, 10, 100, 1000)
+
+
+def smiley_operand(calc: SmileyCalculator, size: int, seed: int) -> str:
+    """Build a deterministic smiley number with the given number of digits."""
+    digits = list(calc.numbers)
+    return digits[1 + seed % 9] + "".join(digits[(i * 7 + seed) % 10] for i in range(size - 1))
+
+
+def build_cases() -> List[Tuple[str, Callable[[], object]]]:
+    """Return the (name, callable) pairs to time."""
+    calc = SmileyCalculator()
+    cases = []
+
+    for size in SIZES:
+        num1 = smiley_operand(calc, size, 3)
+        num2 = smiley_operand(calc, size, 5)
+        number = calc.smiley_to_number(num1)
+        cases.append((f"smiley_to_number[{size}]", lambda num1=num1: calc.smiley_to_number(num1)))
+        cases.append((f"number_to_smiley[{size}]", lambda number=number: calc.number_to_smiley(number)))
+        for operation in calc.operations:
+            name = calc.operations[operation]
+            cases.append((f"calculate[{name},{size}]", lambda a=num1, op=operation, b=num2: calc.calculate(a, op, b)))
+
+    cases.append(("get_help_text", calc.get_help_text))
+
+    from app import app
+
+    client = app.test_client()
+    cases.append(("route[GET /]", lambda: client.get("/")))
+    cases.append(("route[GET /help]", lambda: client.get("/help")))
+    for size in (1, 100):
+        body = {"num1": smiley_operand(calc, size, 3), "operation": "✖️", "num2": smiley_operand(calc, size, 5)}
+        cases.append((f"route[POST /calculate,{size}]", lambda body=body: client.post("/calculate", json=body)))
+        convert = {"smiley": body["num1"]}
+        cases.append((f"route[POST /api/convert,{size}]", lambda convert=convert: client.post("/api/convert", json=convert)))
+
+    return cases
+
+
+def run(cases: List[Tuple[str, Callable[[], object]]], repeat: int) -> Dict[str, float]:
+    """Time each case and return the best nanoseconds per call."""
+    results = {}
+    for name, func in cases:
+        timer = timeit.Timer(func)
+        number, _ = timer.autorange()
+        results[name] = min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """Return descriptions of the cases slower than baseline * (1 + threshold)."""
+    regressions = []
+    for name, value in results.items():
+        reference = baseline.get(name)
+        if reference and value > reference * (1 + threshold):
+            regressions.append(f"{name}: {reference:,.0f}ns -> {value:,.0f}ns (+{(value / reference - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main() -> int:
+    """Run the suite, print a report and apply the regression gate."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--save", metavar="FILE", help="write the results as a JSON baseline")
+    parser.add_argument("--baseline", metavar="FILE", help="compare against a saved JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown as a fraction (default: 0.25)")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repetitions per case; the best is kept")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    args = parser.parse_args()
+
+    cases = [(name, func) for name, func in build_cases() if args.filter in name]
+    results = run(cases, args.repeat)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)["results"]
+
+    print(f"{'case':<40} {'time':>14} {'baseline':>14} {'change':>8}")
+    for name, value in results.items():
+        reference = baseline.get(name)
+        change = f"{(value / reference - 1) * 100:+.0f}%" if reference else "-"
+        reference_text = f"{reference:,.0f}ns" if reference else "-"
+        print(f"{name:<40} {value:>12,.0f}ns {reference_text:>14} {change:>8}")
+
+    if args.save:
+        document = {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "results": results,
+        }
+        with open(args.save, "w", encoding="utf-8") as handle:
+            json.dump(document, handle, indent=2, sort_keys=True)
+        print(f"\n💾 Saved baseline to {args.save}")
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} case(s) regressed by more than {args.threshold * 100:.0f}%:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    if baseline:
+        print(f"\n✅ No regressions beyond {args.threshold * 100:.0f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
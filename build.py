@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+build.py
+Static-site build pipeline for the Smiley Calculator.
+Copies the site into dist/, minifies HTML, CSS and inline JavaScript,
+content-hashes the files under static/ and rewrites references to them,
+writes .gz and .br siblings and prints a size report.
+
+By default the standalone pages (index.html, help.html), which calculate in the
+browser and are what Netlify serves, are built. With --from-templates the Flask
+templates are rendered instead, for serving in front of the Python app.
+
+Usage: python build.py [--out dist] [--from-templates]
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import re
+import shutil
+from typing import Dict, List, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Length of the content hash inserted into asset filenames
+HASH_LENGTH = 10
+
+# Files smaller than this are not precompressed
+COMPRESS_MIN_BYTES = 256
+
+# Extensions that get .gz and .br siblings
+COMPRESSIBLE = (".html", ".css", ".js", ".svg", ".json", ".txt")
+
+PRESERVED_BLOCK = re.compile(r"(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\2>)", re.S | re.I)
+
+
+def minify_css(css: str) -> str:
+    """Remove comments and insignificant whitespace from CSS."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{}:;,>])\s*", r"\1", css)
+    css = css.replace(";}", "}")
+    return css.strip()
+
+
+def minify_js(js: str) -> str:
+    """Conservatively minify inline JavaScript.
+
+    Only indentation, blank lines and whole-line // comments are removed;
+    line breaks are kept so automatic semicolon insertion is unaffected.
+    """
+    lines = []
+    for line in js.splitlines():
+        stripped = line.strip()
+        if stripped and not stripped.startswith("//"):
+            lines.append(stripped)
+    return "\n".join(lines)
+
+
+def minify_html(html: str) -> str:
+    """Minify HTML, including inline <style> and <script> blocks.
+
+    Comments are removed and each line is stripped; a line break renders like
+    the indentation it replaces, so the layout does not change.
+    """
+    blocks: List[str] = []
+
+    def keep(match: re.Match) -> str:
+        opening, tag, content, closing = match.groups()
+        if tag.lower() == "style":
+            content = minify_css(content)
+        elif tag.lower() == "script":
+            content = minify_js(content)
+        blocks.append(opening + content + closing)
+        return f"\x00{len(blocks) - 1}\x00"
+
+    html = PRESERVED_BLOCK.sub(keep, html)
+    html = re.sub(r"<!--(?!\[if).*?-->", "", html, flags=re.S)
+    html = "\n".join(line.strip() for line in html.splitlines() if line.strip())
+    return re.sub(r"\x00(\d+)\x00", lambda match: blocks[int(match.group(1))], html)
+
+
+def render_templates() -> Dict[str, str]:
+    """Render the Flask templates to static HTML."""
+    from app import app, calc
+
+    with app.app_context():
+        from flask import render_template
+
+        return {
+            "index.html": render_template(
+                "index.html",
+                numbers=calc.numbers,
+                operations=calc.operations,
+                reverse_numbers=calc.reverse_numbers,
+                reverse_operations=calc.reverse_operations,
+            ),
+            "help.html": render_template("help.html", numbers=calc.numbers, operations=calc.operations),
+        }
+
+
+def read_pages() -> Dict[str, str]:
+    """Read the standalone static pages."""
+    pages = {}
+    for name in ("index.html", "help.html"):
+        with open(os.path.join(ROOT, name), encoding="utf-8") as handle:
+            pages[name] = handle.read()
+    return pages
+
+
+def fingerprint_assets(out_dir: str) -> Dict[str, str]:
+    """Minify and copy static/ with content-hashed names; return {old path: new path}."""
+    renames = {}
+    source_dir = os.path.join(ROOT, "static")
+    for directory, _, files in os.walk(source_dir):
+        for filename in sorted(files):
+            source = os.path.join(directory, filename)
+            relative = os.path.relpath(source, ROOT).replace(os.sep, "/")
+            with open(source, "rb") as handle:
+                data = handle.read()
+            if filename.endswith(".css"):
+                data = minify_css(data.decode("utf-8")).encode("utf-8")
+            elif filename.endswith(".js"):
+                data = minify_js(data.decode("utf-8")).encode("utf-8")
+
+            stem, extension = os.path.splitext(relative)
+            hashed = f"{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{extension}"
+            target = os.path.join(out_dir, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as handle:
+                handle.write(data)
+            renames[relative] = hashed
+    return renames
+
+
+def rewrite_references(text: str, renames: Dict[str, str]) -> str:
+    """Point references to static assets at their hashed names."""
+    for old, new in renames.items():
+        text = re.sub(r"(?<![\w.-])(/?)" + re.escape(old) + r"(?![\w.-])", lambda match: match.group(1) + new, text)
+    return text
+
+
+def precompress(path: str) -> Tuple[int, int]:
+    """Write .gz and .br siblings for a file and return their sizes (0 when skipped)."""
+    with open(path, "rb") as handle:
+        data = handle.read()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return 0, 0
+
+    gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+    with open(path + ".gz", "wb") as handle:
+        handle.write(gzipped)
+
+    brotli_size = 0
+    if brotli is not None:
+        compressed = brotli.compress(data, quality=11)
+        with open(path + ".br", "wb") as handle:
+            handle.write(compressed)
+        brotli_size = len(compressed)
+    return len(gzipped), brotli_size
+
+
+def build(out_dir: str, from_templates: bool = False) -> List[Tuple[str, int, int, int, int]]:
+    """Build the site into out_dir and return (file, source, minified, gzip, brotli) sizes."""
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir)
+
+    renames = fingerprint_assets(out_dir)
+    pages = render_templates() if from_templates else read_pages()
+
+    report = []
+    for name, html in pages.items():
+        minified = rewrite_references(minify_html(html), renames)
+        with open(os.path.join(out_dir, name), "w", encoding="utf-8") as handle:
+            handle.write(minified)
+        report.append((name, len(html.encode("utf-8")), len(minified.encode("utf-8"))))
+
+    for old, new in renames.items():
+        report.append((new, os.path.getsize(os.path.join(ROOT, old)), os.path.getsize(os.path.join(out_dir, new))))
+
+    sizes = []
+    for name, source_size, minified_size in report:
+        gzip_size, brotli_size = precompress(os.path.join(out_dir, name))
+        sizes.append((name, source_size, minified_size, gzip_size, brotli_size))
+    return sizes
+
+
+def print_report(sizes: List[Tuple[str, int, int, int, int]]):
+    """Print the size of every file at each stage."""
+    print(f"{'file':<32} {'source':>9} {'minified':>9} {'gzip':>9} {'brotli':>9}")
+    totals = [0, 0, 0, 0]
+    for name, *values in sizes:
+        cells = [f"{value:,}" if value else "-" for value in values]
+        print(f"{name:<32} {cells[0]:>9} {cells[1]:>9} {cells[2]:>9} {cells[3]:>9}")
+        totals = [total + value for total, value in zip(totals, values)]
+    print(f"{'total':<32} {totals[0]:>9,} {totals[1]:>9,} {totals[2]:>9,} {totals[3] or '-':>9}")
+    if brotli is None:
+        print("💡 Install 'brotli' to also write .br files")
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="🧮 Build the Smiley Calculator static site")
+    parser.add_argument("--out", default=os.path.join(ROOT, "dist"), help="output directory (default: dist)")
+    parser.add_argument("--from-templates", action="store_true", help="render the Flask templates instead of the standalone pages")
+    args = parser.parse_args()
+
+    print_report(build(args.out, args.from_templates))
+    print(f"✅ Site built in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
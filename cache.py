@@ -0,0 +1,81 @@
+"""
+cache.py
+Small bounded caches shared by the calculator components.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Union
+
+# Sentinel for lookups where None is a valid cached value
+MISSING = object()
+
+
+class LRUCache:
+    """A size-bounded mapping that evicts the least recently used entry.
+
+    Hits, misses and evictions are counted so the hit rate can be read at runtime.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        """Create an empty cache holding at most maxsize entries."""
+        if maxsize < 1:
+            raise ValueError("Cache size must be at least 1")
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key and mark it as recently used."""
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Remove a single entry and return whether it was cached."""
+        with self._lock:
+            return self._entries.pop(key, MISSING) is not MISSING
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Return the current size, counters and hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -4,41 +4,83 @@ calculator.py
 This calculator provides a fun, user-friendly CLI interface with visual feedback.
 """
 
+import io
 import sys
-import random
-from typing import Dict, List, Tuple, Union
+from itertools import islice
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from cache import MISSING, LRUCache
+from expression import ExpressionEngine
+from reductions import REDUCTIONS, Reducer
+from smiley_codec import DEFAULT_ALPHABET, FLOAT_EXACT_LIMIT, get_codec, number_to_text
+
+# argparse, random and the tokenizer are imported where used, keeping `-e` startup short
+if TYPE_CHECKING:
+    import argparse
+
+    from tokenizer import SmileyTokenizer
+
+
+# Number of compiled expressions kept by each calculator
+EXPRESSION_CACHE_SIZE = 1024
+
+# Inputs longer than this many characters are never memoized, to bound cache memory
+CACHEABLE_LENGTH = 256
+
+# Number of input lines read, evaluated and written together in batch mode
+BATCH_BLOCK_LINES = 8192
+
+# Translation table that deletes ASCII numeral characters, used to validate decoded text
+ASCII_NUMERAL_CHARS = str.maketrans('', '', '0123456789.\n')
+
+# Operation mappings shared by every calculator: each smiley represents an operation
+OPERATIONS = {
+    '➕': 'add',        # Plus sign
+    '➖': 'subtract',   # Minus sign
+    '✖️': 'multiply',   # Heavy multiplication x
+    '➗': 'divide',     # Heavy division sign
+}
+REVERSE_OPERATIONS = {name: smiley for smiley, name in OPERATIONS.items()}
+
+# Array operations used by calculate_batch for each operation name
+BATCH_OPERATIONS = {
+    'add': lambda a, b: a + b,
+    'subtract': lambda a, b: a - b,
+    'multiply': lambda a, b: a * b,
+    'divide': lambda a, b: a / b,
+}
 
 
 class SmileyCalculator:
     """A revolutionary calculator that uses smilies instead of numbers and operations."""
     
-    def __init__(self):
-        """Initialize the calculator with smiley mappings."""
-        # Number mappings: Each smiley represents a number 0-9
-        self.numbers = {
-            '😀': 0,  # Grinning face
-            '😊': 1,  # Smiling face with smiling eyes
-            '😁': 2,  # Beaming face with smiling eyes
-            '😂': 3,  # Face with tears of joy
-            '😃': 4,  # Grinning face with big eyes
-            '😄': 5,  # Grinning face with smiling eyes
-            '😆': 6,  # Grinning squinting face
-            '😇': 7,  # Smiling face with halo
-            '😈': 8,  # Smiling face with horns
-            '😉': 9,  # Winking face
-        }
+    def __init__(self, big_numbers: bool = False, cache_size: int = 0, alphabet: str = DEFAULT_ALPHABET):
+        """Initialize the calculator with smiley mappings.
+
+        With big_numbers enabled, division of integers that divide evenly
+        returns an exact int instead of a float, so huge results survive.
+        A positive cache_size memoizes calculate, smiley_to_number and
+        number_to_smiley in an LRU cache of that many entries. alphabet names
+        a registered digit alphabet (see smiley_codec.ALPHABETS); its base is
+        its number of digits.
+        """
+        self.big_numbers = big_numbers
+        self.cache = LRUCache(cache_size) if cache_size > 0 else None
+        
+        # Precompiled translation tables for the digit alphabet, shared with other calculators
+        self.alphabet = alphabet
+        self.codec = get_codec(alphabet)
+        
+        # Number mappings: Each smiley represents a digit 0 to base - 1
+        self.numbers = self.codec.numbers
+        self.reverse_numbers = self.codec.reverse_numbers
         
         # Operation mappings: Each smiley represents an operation
-        self.operations = {
-            '➕': 'add',        # Plus sign
-            '➖': 'subtract',   # Minus sign
-            '✖️': 'multiply',   # Heavy multiplication x
-            '➗': 'divide',     # Heavy division sign
-        }
+        self.operations = dict(OPERATIONS)
+        self.reverse_operations = dict(REVERSE_OPERATIONS)
         
-        # Reverse mappings for display
-        self.reverse_numbers = {v: k for k, v in self.numbers.items()}
-        self.reverse_operations = {v: k for k, v in self.operations.items()}
+        # Compiled expression programs, cached by expression text
+        self.expressions = ExpressionEngine(self, cache_size=EXPRESSION_CACHE_SIZE)
         
         # Success/failure expressions
         self.success_expressions = ['🎉', '✨', '🌟', '💫', '🎊', '🔥', '👏', '🎈']
@@ -60,53 +102,46 @@ class SmileyCalculator:
         """Divide a by b."""
         if b == 0:
             raise ValueError("Cannot divide by zero! 🚫")
+        if self.big_numbers and type(a) is int and type(b) is int and a % b == 0:
+            return a // b
         return a / b
     
     def smiley_to_number(self, smiley_string: str) -> float:
         """Convert a string of smiley digits to a number."""
-        if not smiley_string:
-            return 0
-        
-        # Handle decimal point
-        if '.' in smiley_string:
-            integer_part, decimal_part = smiley_string.split('.')
-            integer_value = self._convert_smiley_digits(integer_part)
-            decimal_value = self._convert_smiley_digits(decimal_part)
-            return integer_value + decimal_value / (10 ** len(decimal_part))
-        else:
-            return self._convert_smiley_digits(smiley_string)
+        if self.cache is not None and len(smiley_string) <= CACHEABLE_LENGTH:
+            return self._memoized(('decode', smiley_string), self.codec.decode, smiley_string)
+        return self.codec.decode(smiley_string)
     
     def _convert_smiley_digits(self, smiley_string: str) -> float:
         """Convert smiley digits to numeric value."""
-        result = 0
-        for smiley in smiley_string:
-            if smiley in self.numbers:
-                result = result * 10 + self.numbers[smiley]
-            elif smiley != '.':  # Ignore decimal point
-                raise ValueError(f"Unknown smiley digit: {smiley}")
-        return result
+        return self.codec.decode_digits(smiley_string)
     
     def number_to_smiley(self, number: float) -> str:
         """Convert a number to smiley representation."""
-        if number == int(number):
-            number = int(number)
-        
-        number_str = str(number)
-        smiley_result = ""
-        
-        for char in number_str:
-            if char.isdigit():
-                smiley_result += self.reverse_numbers[int(char)]
-            elif char == '.':
-                smiley_result += '.'
-            elif char == '-':
-                smiley_result += '➖'
-        
-        return smiley_result
+        if self.cache is not None and type(number) in (int, float) and abs(number) < 10 ** CACHEABLE_LENGTH:
+            return self._memoized(('encode', number), self.codec.encode, number)
+        return self.codec.encode(number)
+    
+    def _memoized(self, key: tuple, func, *args):
+        """Return func(*args) from the cache, computing and storing it on a miss."""
+        value = self.cache.get(key, MISSING)
+        if value is MISSING:
+            value = func(*args)
+            self.cache.put(key, value)
+        return value
+    
+    def cache_stats(self) -> Optional[Dict[str, Union[int, float]]]:
+        """Return hit, miss and eviction counters of the memoization cache, if enabled."""
+        return self.cache.stats() if self.cache is not None else None
+    
+    def clear_cache(self):
+        """Drop every memoized result."""
+        if self.cache is not None:
+            self.cache.clear()
     
     def get_operation_function(self, operation_smiley: str):
         """Get the operation function for a given smiley."""
-        if operation_smiley not in self.operations:
+        if not isinstance(operation_smiley, str) or operation_smiley not in self.operations:
             raise ValueError(f"Unknown operation: {operation_smiley}")
         
         operation_name = self.operations[operation_smiley]
@@ -114,6 +149,13 @@ class SmileyCalculator:
     
     def calculate(self, num1_smiley: str, operation_smiley: str, num2_smiley: str) -> str:
         """Perform calculation with smiley inputs and return smiley result."""
+        if self.cache is not None and len(num1_smiley) + len(num2_smiley) <= CACHEABLE_LENGTH:
+            key = ('calculate', num1_smiley, operation_smiley, num2_smiley)
+            return self._memoized(key, self._calculate, num1_smiley, operation_smiley, num2_smiley)
+        return self._calculate(num1_smiley, operation_smiley, num2_smiley)
+    
+    def _calculate(self, num1_smiley: str, operation_smiley: str, num2_smiley: str) -> str:
+        """Perform an uncached calculation."""
         try:
             # Convert smiley inputs to numbers
             num1 = self.smiley_to_number(num1_smiley)
@@ -131,6 +173,127 @@ class SmileyCalculator:
         except Exception as e:
             raise ValueError(f"Calculation error: {e}")
     
+    def calculate_detailed(self, num1_smiley: str, operation_smiley: str, num2_smiley: str) -> Dict[str, Union[str, int, float]]:
+        """Perform a calculation and return every display field in one pass.
+
+        The operands are decoded and the result encoded exactly once, so the
+        regular numbers come from the calculation itself instead of decoding
+        the smiley strings again.
+        """
+        try:
+            num1 = SmileyNumber(self, smiley=num1_smiley)
+            num2 = SmileyNumber(self, smiley=num2_smiley)
+            operation_func = self.get_operation_function(operation_smiley)
+            result = SmileyNumber(self, value=operation_func(num1.value, num2.value))
+            
+            return {
+                "num1": num1_smiley,
+                "operation": operation_smiley,
+                "num2": num2_smiley,
+                "result": result.smiley,
+                "num1_regular": num1.value,
+                "num2_regular": num2.value,
+                "result_regular": result.value,
+                "operation_name": operation_func.__name__,
+            }
+        
+        except Exception as e:
+            raise ValueError(f"Calculation error: {e}")
+    
+    def evaluate(self, expression: str) -> str:
+        """Evaluate a smiley expression such as 😊😀➕😁✖️(😂➖😊) and return the smiley result."""
+        try:
+            return self.number_to_smiley(self.expressions.evaluate(expression))
+        except Exception as e:
+            raise ValueError(f"Calculation error: {e}")
+    
+    def aggregate(self, smileys: Iterable[str], operations: Sequence[str] = REDUCTIONS) -> Dict[str, str]:
+        """Reduce smiley numbers in one pass and return each requested reduction as a smiley.
+
+        operations are names from reductions.REDUCTIONS: sum, product, mean,
+        min, max and variance (the population variance). The iterable is
+        consumed lazily and never stored, so it may be arbitrarily long.
+        Values may be negative, with a leading ➖ as number_to_smiley writes them.
+        """
+        decode = self.smiley_to_number
+        try:
+            reducer = Reducer(operations)
+            reducer.update(-decode(smiley[1:]) if smiley.startswith('➖') else decode(smiley) for smiley in smileys)
+            return {operation: self.number_to_smiley(value) for operation, value in reducer.results().items()}
+        except Exception as e:
+            raise ValueError(f"Calculation error: {e}")
+    
+    def reduce(self, operation: str, smileys: Iterable[str]) -> str:
+        """Return one reduction (e.g. 'sum' or 'mean') of smiley numbers as a smiley."""
+        return self.aggregate(smileys, (operation,))[operation]
+    
+    def tokenizer(self) -> 'SmileyTokenizer':
+        """Return a new incremental tokenizer for chunked input in this calculator's alphabet."""
+        from tokenizer import SmileyTokenizer
+        
+        return SmileyTokenizer(self)
+    
+    def calculate_batch(self, calculations: List[Tuple[str, str, str]]) -> Tuple[List[Optional[str]], List[Optional[str]]]:
+        """Perform many calculations at once with NumPy and return per-item results and errors.
+
+        Operands are decoded up front, grouped by operation and each group is
+        computed as a single array operation. Items whose values are too large
+        to be represented exactly as floats fall back to ``calculate``.
+        """
+        import numpy as np
+
+        count = len(calculations)
+        results: List[Optional[str]] = [None] * count
+        errors: List[Optional[str]] = [None] * count
+        num1_values = np.zeros(count, dtype=np.float64)
+        num2_values = np.zeros(count, dtype=np.float64)
+        groups: Dict[str, List[int]] = {}
+        exact_only = []
+
+        # Decode every operand once and group the items by operation
+        for index, (num1_smiley, operation_smiley, num2_smiley) in enumerate(calculations):
+            try:
+                num1 = self.smiley_to_number(num1_smiley)
+                num2 = self.smiley_to_number(num2_smiley)
+                operation_name = self.get_operation_function(operation_smiley).__name__
+            except Exception as e:
+                errors[index] = f"Calculation error: {e}"
+                continue
+            if abs(num1) >= FLOAT_EXACT_LIMIT or abs(num2) >= FLOAT_EXACT_LIMIT:
+                exact_only.append(index)
+                continue
+            num1_values[index] = num1
+            num2_values[index] = num2
+            groups.setdefault(operation_name, []).append(index)
+
+        # Run each operation group as one vectorized array operation
+        for operation_name, indices in groups.items():
+            index_array = np.array(indices, dtype=np.intp)
+            a = num1_values[index_array]
+            b = num2_values[index_array]
+            if operation_name == 'divide':
+                zero_mask = b == 0
+                for index in index_array[zero_mask].tolist():
+                    errors[index] = "Calculation error: Cannot divide by zero! 🚫"
+                index_array = index_array[~zero_mask]
+                a = a[~zero_mask]
+                b = b[~zero_mask]
+            values = BATCH_OPERATIONS[operation_name](a, b)
+            for index, value in zip(index_array.tolist(), values.tolist()):
+                if abs(value) >= FLOAT_EXACT_LIMIT:
+                    exact_only.append(index)
+                else:
+                    results[index] = self.number_to_smiley(value)
+
+        # Values outside the exact float range keep Python's arbitrary precision
+        for index in exact_only:
+            try:
+                results[index] = self.calculate(*calculations[index])
+            except Exception as e:
+                errors[index] = str(e)
+
+        return results, errors
+    
     def get_help_text(self) -> str:
         """Return help text explaining the smiley system."""
         help_text = "\n🌟 Welcome to the Smiley Calculator! 🌟\n\n"
@@ -143,13 +306,240 @@ class SmileyCalculator:
             help_text += f"  {smiley} = {operation}\n"
         
         help_text += "\n💡 EXAMPLES:\n"
-        help_text += f"  {self.reverse_numbers[2]} ➕ {self.reverse_numbers[3]} = {self.reverse_numbers[5]} (2 + 3 = 5)\n"
-        help_text += f"  {self.reverse_numbers[1]}{self.reverse_numbers[0]} ➖ {self.reverse_numbers[5]} = {self.reverse_numbers[5]} (10 - 5 = 5)\n"
+        two, three, five, ten = (self.number_to_smiley(number) for number in (2, 3, 5, 10))
+        help_text += f"  {two} ➕ {three} = {five} (2 + 3 = 5)\n"
+        help_text += f"  {ten} ➖ {five} = {five} (10 - 5 = 5)\n"
         
         return help_text
 
 
 
+class SmileyNumber:
+    """A number and its smiley encoding, each computed lazily at most once."""
+    
+    __slots__ = ('calc', '_value', '_smiley')
+    
+    def __init__(self, calc: SmileyCalculator, smiley: Optional[str] = None, value: Union[int, float, None] = None):
+        """Wrap a smiley string or a regular number.
+
+        Whole floats are stored as ints, the number their smiley encoding
+        stands for.
+        """
+        if type(value) is float and value.is_integer():
+            value = int(value)
+        self.calc = calc
+        self._smiley = MISSING if smiley is None else smiley
+        self._value = MISSING if value is None else value
+    
+    @property
+    def value(self) -> Union[int, float]:
+        """The regular number, decoded on first use."""
+        if self._value is MISSING:
+            self._value = self.calc.smiley_to_number(self._smiley)
+        return self._value
+    
+    @property
+    def smiley(self) -> str:
+        """The smiley encoding, encoded on first use."""
+        if self._smiley is MISSING:
+            self._smiley = self.calc.number_to_smiley(self._value)
+        return self._smiley
+    
+    def __str__(self) -> str:
+        return self.smiley
+    
+    def __repr__(self) -> str:
+        return f"SmileyNumber({self.smiley!r}, {self.value!r})"
+
+
+# Largest magnitude kept in int64 arrays before SmileyArray switches to exact Python ints
+INT64_SAFE_LIMIT = 2 ** 62
+
+
+def _exceeds_float_range(values) -> bool:
+    """Whether an int or object array holds a value too large for float64 to represent exactly."""
+    if values.dtype.kind == 'i':
+        return bool(((values >= FLOAT_EXACT_LIMIT) | (values <= -FLOAT_EXACT_LIMIT)).any())
+    if values.dtype == object:
+        return any(abs(value) >= FLOAT_EXACT_LIMIT for value in values.ravel().tolist())
+    return False
+
+
+class SmileyArray:
+    """A column of smiley numbers stored as a NumPy array for vectorized bulk arithmetic.
+
+    Values are int64 when every number is a whole number that fits, float64
+    when decimals are involved, and exact Python ints (object dtype) when a
+    number is too large for float64 or an operation would overflow int64.
+    Elementwise ➕ ➖ ✖️ ➗ map to the calculator's operations.
+    """
+    
+    def __init__(self, values, calc: Optional[SmileyCalculator] = None):
+        """Wrap an array (or sequence) of regular numbers."""
+        import numpy as np
+        
+        self.values = np.asarray(values)
+        self.calc = calc if calc is not None else SmileyCalculator()
+    
+    @classmethod
+    def from_smileys(cls, smiley_strings: List[str], calc: Optional[SmileyCalculator] = None) -> 'SmileyArray':
+        """Decode many smiley numbers at once.
+
+        Fixed-width integer data is decoded through a uint8 digit matrix built
+        from the code points; other data is translated to ASCII numerals in one
+        pass and parsed by NumPy. Invalid input raises the same error as
+        smiley_to_number.
+        """
+        import numpy as np
+        
+        calc = calc if calc is not None else SmileyCalculator()
+        if not smiley_strings:
+            return cls(np.zeros(0, dtype=np.int64), calc)
+        if calc.codec.base != 10:
+            # Digit matrices and NumPy parsing are decimal; other bases decode item by item
+            return cls(np.array([calc.smiley_to_number(smiley_string) for smiley_string in smiley_strings]), calc)
+        
+        # Fixed-width integers: map code points straight to a uint8 digit matrix
+        rows, width = len(smiley_strings), len(smiley_strings[0])
+        if 0 < width <= 18:
+            codes = np.frombuffer(('\n'.join(smiley_strings) + '\n').encode('utf-32-le'), dtype=np.uint32)
+            if codes.size == rows * (width + 1) and np.all(codes[width::width + 1] == ord('\n')):
+                matrix = cls.codepoints_to_digit_matrix(codes.reshape(rows, width + 1)[:, :width], calc)
+                if matrix is not None:
+                    return cls(cls.digit_matrix_to_values(matrix), calc)
+        
+        numerals = '\n'.join(smiley_strings).translate(calc.codec.numeral_table)
+        if not numerals.isascii() or numerals.translate(ASCII_NUMERAL_CHARS) or numerals.count('\n') != rows - 1:
+            # Let the scalar decoder raise its usual error for the offending string
+            for smiley_string in smiley_strings:
+                calc.smiley_to_number(smiley_string)
+        parts = numerals.split('\n')
+        
+        try:
+            if max(map(len, parts)) <= 15:
+                split = np.char.partition(np.array(parts), '.')
+                integers = np.char.add(split[:, 0], '0').astype(np.int64) // 10
+                if '.' not in numerals:
+                    return cls(integers, calc)
+                # Same integer + decimal / 10 ** n arithmetic as smiley_to_number
+                decimals = np.char.add(split[:, 2], '0').astype(np.int64) // 10
+                scale = 10.0 ** np.char.str_len(split[:, 2])
+                return cls(integers + decimals / scale, calc)
+        except ValueError:
+            pass
+        values = [calc.smiley_to_number(smiley_string) for smiley_string in smiley_strings]
+        if '.' in numerals and all(abs(value) < FLOAT_EXACT_LIMIT for value in values):
+            return cls(np.array(values, dtype=np.float64), calc)
+        # Ints too large for a float stay exact Python ints next to any decimals
+        return cls(np.array(values, dtype=object), calc)
+    
+    @staticmethod
+    def codepoints_to_digit_matrix(codes, calc: SmileyCalculator):
+        """Map a matrix of smiley code points to a uint8 digit matrix, or None if any is not a digit."""
+        import numpy as np
+        
+        if any(len(smiley) != 1 for smiley in calc.numbers):
+            return None
+        keys = np.array(sorted(ord(smiley) for smiley in calc.numbers), dtype=np.uint32)
+        digits = np.array([calc.numbers[chr(key)] for key in keys.tolist()], dtype=np.uint8)
+        positions = np.minimum(np.searchsorted(keys, codes), len(keys) - 1)
+        if not np.array_equal(keys[positions], codes):
+            return None
+        return digits[positions]
+    
+    @classmethod
+    def from_digit_matrix(cls, matrix, calc: Optional[SmileyCalculator] = None) -> 'SmileyArray':
+        """Build an array from a fixed-width uint8 digit matrix (one number per row)."""
+        return cls(cls.digit_matrix_to_values(matrix), calc)
+    
+    @staticmethod
+    def digit_matrix_to_values(matrix):
+        """Combine a uint8 digit matrix (most significant digit first) into int64 values."""
+        import numpy as np
+        
+        powers = 10 ** np.arange(matrix.shape[1] - 1, -1, -1, dtype=np.int64)
+        return matrix.astype(np.int64) @ powers
+    
+    def to_digit_matrix(self):
+        """Return the absolute values as a fixed-width uint8 digit matrix (int64 arrays only)."""
+        import numpy as np
+        
+        if self.values.dtype != np.int64:
+            raise ValueError("Digit matrices need whole numbers that fit in int64")
+        magnitudes = np.abs(self.values)
+        width = max(1, len(str(int(magnitudes.max())))) if magnitudes.size else 1
+        powers = 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+        return ((magnitudes[:, None] // powers) % 10).astype(np.uint8)
+    
+    def to_smileys(self) -> List[str]:
+        """Encode every value back to a smiley string."""
+        import numpy as np
+        
+        values = self.values
+        if values.dtype == np.float64 and values.size and np.all(np.isfinite(values)) and np.all(values == np.floor(values)) \
+                and np.abs(values).max() < FLOAT_EXACT_LIMIT:
+            values = values.astype(np.int64)
+        if values.dtype != np.int64 or self.calc.codec.base != 10:
+            return [self.calc.number_to_smiley(value) for value in values.tolist()]
+        if not values.size:
+            return []
+        
+        matrix = SmileyArray(values, self.calc).to_digit_matrix()
+        smiley_digits = np.array([self.calc.reverse_numbers[digit] for digit in range(10)])
+        chars = np.ascontiguousarray(smiley_digits[matrix])
+        rows = chars.view(f'<U{matrix.shape[1]}').ravel().tolist()
+        zero = self.calc.reverse_numbers[0]
+        return [('➖' if negative else '') + (row.lstrip(zero) or zero) for row, negative in zip(rows, (values < 0).tolist())]
+    
+    def apply(self, operation_smiley: str, other) -> 'SmileyArray':
+        """Apply a smiley operation elementwise with another array or a scalar."""
+        import numpy as np
+        
+        operation_name = self.calc.get_operation_function(operation_smiley).__name__
+        right = other.values if isinstance(other, SmileyArray) else other
+        if isinstance(right, str):
+            right = self.calc.smiley_to_number(right)
+        right = np.asarray(right)
+        left = self.values
+        
+        if operation_name == 'divide':
+            if np.any(right == 0):
+                raise ValueError("Cannot divide by zero! 🚫")
+            if _exceeds_float_range(left) or _exceeds_float_range(right):
+                # Dividing the exact values rounds once, as calculate() does; converting to float64 first would round twice
+                divide = np.frompyfunc(self.calc.divide, 2, 1)
+                return SmileyArray(divide(left.astype(object), right.astype(object)), self.calc)
+            return SmileyArray(np.true_divide(left.astype(np.float64) if left.dtype == object else left,
+                                              right.astype(np.float64) if right.dtype == object else right), self.calc)
+        
+        if left.dtype == np.int64 and right.dtype.kind == 'i':
+            left_max = int(np.abs(left).max()) if left.size else 0
+            right_max = int(np.abs(right).max()) if right.size else 0
+            bound = left_max * right_max if operation_name == 'multiply' else left_max + right_max
+            if bound >= INT64_SAFE_LIMIT:
+                left, right = left.astype(object), right.astype(object)
+        return SmileyArray(BATCH_OPERATIONS[operation_name](left, right), self.calc)
+    
+    def __add__(self, other):
+        return self.apply('➕', other)
+    
+    def __sub__(self, other):
+        return self.apply('➖', other)
+    
+    def __mul__(self, other):
+        return self.apply('✖️', other)
+    
+    def __truediv__(self, other):
+        return self.apply('➗', other)
+    
+    def __len__(self) -> int:
+        return len(self.values)
+    
+    def __repr__(self) -> str:
+        preview = self.to_smileys()[:5] if len(self) <= 1000 else SmileyArray(self.values[:5], self.calc).to_smileys()
+        return f"SmileyArray({preview}{', ...' if len(self) > 5 else ''})"
+
+
 def print_banner():
     """Print a beautiful banner for the calculator."""
     print("\n" + "="*50)
@@ -170,6 +560,8 @@ def print_thinking_animation():
 
 def print_success_message():
     """Print a random success message."""
+    import random
+    
     success_emojis = ['🎉', '✨', '🌟', '💫', '🎊', '🔥', '👏', '🎈']
     print(f"\n{random.choice(success_emojis)} Result calculated successfully! {random.choice(success_emojis)}")
 
@@ -217,18 +609,29 @@ def get_user_input(prompt: str, calc: SmileyCalculator, input_type: str) -> str:
 
 def format_calculation_display(num1: str, op: str, num2: str, result: str, calc: SmileyCalculator) -> str:
     """Format the calculation in a beautiful display."""
-    # Convert to regular numbers for reference
-    num1_regular = calc.smiley_to_number(num1)
-    num2_regular = calc.smiley_to_number(num2)
-    result_regular = calc.smiley_to_number(result)
-    op_name = calc.operations[op]
-    
+    return format_calculation({
+        'num1': num1,
+        'operation': op,
+        'num2': num2,
+        'result': result,
+        'num1_regular': calc.smiley_to_number(num1),
+        'num2_regular': calc.smiley_to_number(num2),
+        'result_regular': -calc.smiley_to_number(result[1:]) if result.startswith('➖') else calc.smiley_to_number(result),
+        'operation_name': calc.operations[op],
+    })
+
+
+def format_calculation(calculation: Dict[str, Union[str, int, float]]) -> str:
+    """Format a calculate_detailed() result in a beautiful display."""
+    num1_regular, num2_regular, result_regular = (
+        number_to_text(calculation[key]) for key in ('num1_regular', 'num2_regular', 'result_regular')
+    )
     display = f"""
 ┌─ 🧮 CALCULATION RESULT 🧮 ─┐
 │                              │
-│  {num1} {op} {num2} = {result}
+│  {calculation['num1']} {calculation['operation']} {calculation['num2']} = {calculation['result']}
 │                              │
-│  ({num1_regular} {op_name} {num2_regular} = {result_regular})
+│  ({num1_regular} {calculation['operation_name']} {num2_regular} = {result_regular})
 │                              │
 └──────────────────────────────┘
 """
@@ -265,11 +668,11 @@ def interactive_mode(calc: SmileyCalculator):
             print_thinking_animation()
             
             # Calculate result
-            result = calc.calculate(num1, operation, num2)
+            calculation = calc.calculate_detailed(num1, operation, num2)
             
             # Display result beautifully
             print_success_message()
-            print(format_calculation_display(num1, operation, num2, result, calc))
+            print(format_calculation(calculation))
             
             # Ask if user wants to continue
             print("\n🔄 Ready for another calculation!")
@@ -279,6 +682,34 @@ def interactive_mode(calc: SmileyCalculator):
             print("💡 Type 'help' for guidance or 'quit' to exit.\n")
 
 
+def expression_mode(calc: SmileyCalculator):
+    """Run the calculator in expression mode, evaluating whole formulas."""
+    print("\n🧩 Welcome to Expression Mode!")
+    print("✨ Type a whole formula, e.g. 😊😀➕😁✖️(😂➖😊)")
+    print("✨ Enter 'help' anytime to see the smiley guide")
+    print("✨ Enter 'quit' to exit\n")
+    
+    while True:
+        print("─" * 40)
+        expression = input("Enter expression: ").strip()
+        
+        if expression.lower() in ['quit', 'exit', 'q']:
+            break
+        
+        if expression.lower() in ['help', 'h']:
+            print(calc.get_help_text())
+            continue
+        
+        try:
+            result = calc.expressions.evaluate(expression)
+            print_success_message()
+            print(f"\n  {expression} = {calc.number_to_smiley(result)}")
+            print(f"  ({number_to_text(result)})\n")
+        except Exception as e:
+            print(f"\n❌ Error: {e}")
+            print("💡 Use smiley digits, ➕ ➖ ✖️ ➗ and parentheses.\n")
+
+
 def demo_mode(calc: SmileyCalculator):
     """Run a demonstration of the calculator."""
     print("\n🎭 DEMO MODE - Watch the magic happen! 🎭\n")
@@ -297,9 +728,9 @@ def demo_mode(calc: SmileyCalculator):
         print(f"Smiley: {num1} {op} {num2}")
         
         try:
-            result = calc.calculate(num1, op, num2)
-            print(f"Result: {result}")
-            print(format_calculation_display(num1, op, num2, result, calc))
+            calculation = calc.calculate_detailed(num1, op, num2)
+            print(f"Result: {calculation['result']}")
+            print(format_calculation(calculation))
         except Exception as e:
             print(f"Error in demo: {e}")
         
@@ -312,8 +743,130 @@ def demo_mode(calc: SmileyCalculator):
         print("\n" + "─" * 50 + "\n")
 
 
-def main():
+def evaluate_line(calc: SmileyCalculator, line: str) -> str:
+    """Evaluate one calculation or expression line and return the output line."""
+    expression = line.strip()
+    if not expression:
+        return ""
+    try:
+        return calc.evaluate(expression)
+    except ValueError as e:
+        return f"❌ {e}"
+
+
+_batch_calc = None
+
+
+def _init_batch_worker():
+    """Create the calculator used by a batch worker process."""
+    global _batch_calc
+    _batch_calc = SmileyCalculator()
+
+
+def _evaluate_batch_line(line: str) -> str:
+    """Evaluate a line in a batch worker process."""
+    return evaluate_line(_batch_calc, line)
+
+
+def batch_mode(calc: SmileyCalculator, source: io.TextIOBase, output: io.TextIOBase, jobs: int = 1):
+    """Evaluate one calculation per input line and stream the results in input order.
+
+    Lines are handled in blocks so memory stays bounded and output is written
+    in large buffered chunks. With jobs > 1, each block is spread over a
+    process pool and the results keep the input order.
+    """
+    executor = None
+    if jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=jobs, initializer=_init_batch_worker)
+    
+    try:
+        while True:
+            block = list(islice(source, BATCH_BLOCK_LINES))
+            if not block:
+                break
+            if executor is not None:
+                results = executor.map(_evaluate_batch_line, block, chunksize=max(1, len(block) // (jobs * 4)))
+            else:
+                results = [evaluate_line(calc, line) for line in block]
+            output.write("\n".join(results))
+            output.write("\n")
+            output.flush()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> 'argparse.Namespace':
+    """Parse the command-line options."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="🧮 Smiley Calculator")
+    parser.add_argument("-e", "--eval", metavar="EXPRESSION",
+                        help="print the result of one calculation or expression and exit")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="evaluate one calculation or expression per line of FILE ('-' for stdin) and print the results")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N",
+                        help="number of worker processes for --batch (default: 1)")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="profile this process and write pstats to FILE (sampled collapsed stacks if FILE ends in .collapsed)")
+    parser.add_argument("--trace-memory", metavar="FILE",
+                        help="write the allocation sites holding the most memory at exit to FILE")
+    return parser.parse_args(argv)
+
+
+def run_batch(path: str, jobs: int = 1):
+    """Run batch mode on a file or stdin, writing UTF-8 results to stdout."""
+    output = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', write_through=False)
+    if path == '-':
+        source = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+        batch_mode(SmileyCalculator(), source, output, jobs)
+    else:
+        with open(path, encoding='utf-8') as source:
+            batch_mode(SmileyCalculator(), source, output, jobs)
+    output.flush()
+
+
+def evaluate_once(expression: str) -> int:
+    """Print the result of one calculation or expression and return the exit status."""
+    result = evaluate_line(SmileyCalculator(), expression)
+    if result.startswith("❌"):
+        sys.stderr.buffer.write(f"{result}\n".encode('utf-8'))
+        return 1
+    sys.stdout.buffer.write(f"{result}\n".encode('utf-8'))
+    return 0
+
+
+def main(argv: Optional[List[str]] = None):
     """Main function to run the smiley calculator."""
+    if argv is None:
+        argv = sys.argv[1:]
+    # One-shot evaluation skips argparse, the banner and the menu
+    if len(argv) == 2 and argv[0] in ('-e', '--eval'):
+        sys.exit(evaluate_once(argv[1]))
+    
+    args = parse_arguments(argv)
+    if args.profile or args.trace_memory:
+        from profiling import profile_run
+        
+        with profile_run(args.profile, args.trace_memory):
+            run(args)
+    else:
+        run(args)
+
+
+def run(args: 'argparse.Namespace'):
+    """Run one-shot evaluation, batch mode or the interactive menu."""
+    if args.eval is not None:
+        status = evaluate_once(args.eval)
+        if status:
+            sys.exit(status)
+        return
+    
+    if args.batch:
+        run_batch(args.batch, args.jobs)
+        return
+    
     calc = SmileyCalculator()
     
     print_banner()
@@ -325,8 +878,9 @@ def main():
         print("2. 🎭 Demo Mode - Watch examples")
         print("3. 📚 Show Help - Learn the smiley system")
         print("4. 🚪 Exit")
+        print("5. 🧩 Expression Mode - Evaluate whole formulas")
         
-        choice = input("\nEnter your choice (1-4): ").strip()
+        choice = input("\nEnter your choice (1-5): ").strip()
         
         if choice == '1':
             interactive_mode(calc)
@@ -338,8 +892,10 @@ def main():
             print("\n🎉 Thanks for using the Smiley Calculator!")
             print("😊 Have a great day! 😊")
             break
+        elif choice == '5':
+            expression_mode(calc)
         else:
-            print("❌ Invalid choice. Please enter 1, 2, 3, or 4.")
+            print("❌ Invalid choice. Please enter 1, 2, 3, 4, or 5.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,118 @@
+"""
+channel.py
+Persistent result channels for the Smiley Calculator web page.
+The page opens one Server-Sent Events stream (GET /channel) and keeps it
+open. It posts batches of messages, each tagged with a correlation id, to
+/channel/<id>, and every result comes back as an event on the stream with the
+same id. A page can keep sending while earlier batches are in flight, so live
+keystroke previews cost one small POST per batch instead of a full
+request/response per result.
+"""
+
+import json
+import queue
+import secrets
+import threading
+import time
+from typing import Dict, Iterator, Optional
+
+from admission import Overloaded
+
+# Seconds between SSE comment lines that keep idle connections (and proxies) open
+HEARTBEAT_INTERVAL = 15.0
+
+# Longest a stream stays open; the browser then reconnects, so stopping workers are not held up
+MAX_STREAM_SECONDS = 300.0
+
+# Milliseconds the browser waits before reconnecting a closed stream
+RECONNECT_DELAY_MS = 1000
+
+# Results buffered for a stream that is not reading; further results are dropped
+MAX_PENDING_EVENTS = 1000
+
+# Channels open at once in one process, and messages accepted in one POST
+MAX_CHANNELS = 10000
+MAX_BATCH = 100
+
+
+def format_event(payload: dict, event: Optional[str] = None) -> str:
+    """Format a JSON payload as one Server-Sent Event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+class Channel:
+    """The result queue behind one open event stream."""
+
+    def __init__(self, channel_id: str):
+        self.id = channel_id
+        self.events: queue.Queue = queue.Queue(MAX_PENDING_EVENTS)
+        self.dropped = 0
+        self.closed = False
+
+    def publish(self, payload: dict) -> bool:
+        """Queue a result for the stream; False if the stream is too far behind and it was dropped."""
+        try:
+            self.events.put_nowait(payload)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def stream(self, heartbeat: float = HEARTBEAT_INTERVAL, max_seconds: float = MAX_STREAM_SECONDS) -> Iterator[str]:
+        """Yield the ready event, then one event per published result until closed or max_seconds pass."""
+        yield f"retry: {RECONNECT_DELAY_MS}\n" + format_event({"channel": self.id}, event="ready")
+        deadline = time.monotonic() + max_seconds
+        while not self.closed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                payload = self.events.get(timeout=min(heartbeat, remaining))
+            except queue.Empty:
+                if remaining > heartbeat:
+                    yield ": heartbeat\n\n"
+                continue
+            if payload is None:
+                return
+            yield format_event(payload)
+
+    def close(self):
+        """End the stream; results not yet sent are discarded."""
+        self.closed = True
+        try:
+            self.events.put_nowait(None)
+        except queue.Full:
+            pass
+
+
+class ChannelHub:
+    """The open channels of this process, by unguessable id."""
+
+    def __init__(self, max_channels: int = MAX_CHANNELS):
+        self.max_channels = max_channels
+        self.channels: Dict[str, Channel] = {}
+        self._lock = threading.Lock()
+
+    def open(self) -> Channel:
+        """Create a channel, or raise Overloaded when too many are open."""
+        with self._lock:
+            if len(self.channels) >= self.max_channels:
+                raise Overloaded("Server busy: too many open channels", RECONNECT_DELAY_MS // 1000 or 1)
+            channel = Channel(secrets.token_urlsafe(16))
+            self.channels[channel.id] = channel
+        return channel
+
+    def get(self, channel_id: str) -> Optional[Channel]:
+        """Return an open channel, or None."""
+        return self.channels.get(channel_id)
+
+    def close(self, channel_id: str):
+        """Close and forget a channel."""
+        with self._lock:
+            channel = self.channels.pop(channel_id, None)
+        if channel is not None:
+            channel.close()
+
+    def __len__(self) -> int:
+        return len(self.channels)
@@ -0,0 +1,158 @@
+"""
+expression.py
+Expression engine for the Smiley Calculator.
+Parses formulas such as 😊😀➕😁✖️(😂➖😊) with the usual precedence rules,
+compiles them to a flat stack-machine program and keeps the compiled programs
+in an LRU cache, so repeated formulas are only parsed once.
+"""
+
+from typing import List, Tuple, Union
+
+from cache import LRUCache
+
+# Instruction opcodes of a compiled program
+PUSH = 0      # push a constant
+NEGATE = 1    # negate the top of the stack
+APPLY = 2     # pop two values and apply a calculator operation
+
+# Operation precedence: multiplication and division bind tighter
+PRECEDENCE = {
+    'add': 1,
+    'subtract': 1,
+    'multiply': 2,
+    'divide': 2,
+}
+
+VARIATION_SELECTOR = '\ufe0f'
+
+Token = Tuple[str, str, int]
+Instruction = Tuple[int, Union[int, float, str, None]]
+
+
+class ExpressionEngine:
+    """Compile and evaluate smiley expressions for a SmileyCalculator."""
+
+    def __init__(self, calc, cache_size: int = 256):
+        """Create an engine bound to a calculator's digits and operations."""
+        self.calc = calc
+        self.programs = LRUCache(cache_size)
+
+        # Operation symbols, longest first so multi-code-point symbols win;
+        # symbols such as ✖️ also match without their variation selector
+        symbols = dict(calc.operations)
+        for symbol, name in calc.operations.items():
+            if symbol.endswith(VARIATION_SELECTOR):
+                symbols.setdefault(symbol[:-len(VARIATION_SELECTOR)], name)
+        self.operation_symbols = sorted(symbols.items(), key=lambda item: -len(item[0]))
+
+    def evaluate(self, expression: str) -> Union[int, float]:
+        """Evaluate an expression and return the numeric result."""
+        return self.run(self.compile(expression))
+
+    def compile(self, expression: str) -> List[Instruction]:
+        """Return the compiled program for an expression, using the cache."""
+        program = self.programs.get(expression)
+        if program is None:
+            program = _Parser(self, self.tokenize(expression)).parse()
+            self.programs.put(expression, program)
+        return program
+
+    def run(self, program: List[Instruction]) -> Union[int, float]:
+        """Execute a compiled program on the calculator's operations."""
+        calc = self.calc
+        stack = []
+        for opcode, argument in program:
+            if opcode == PUSH:
+                stack.append(argument)
+            elif opcode == NEGATE:
+                stack[-1] = -stack[-1]
+            else:
+                right = stack.pop()
+                stack[-1] = getattr(calc, argument)(stack[-1], right)
+        return stack[0]
+
+    def tokenize(self, expression: str) -> List[Token]:
+        """Split an expression into number, operator and parenthesis tokens."""
+        numbers = self.calc.numbers
+        tokens = []
+        position = 0
+        length = len(expression)
+
+        while position < length:
+            char = expression[position]
+            if char.isspace():
+                position += 1
+            elif char in numbers or char == '.':
+                start = position
+                while position < length and (expression[position] in numbers or expression[position] == '.'):
+                    position += 1
+                tokens.append(('number', expression[start:position], start))
+            elif char in '()':
+                tokens.append((char, char, position))
+                position += 1
+            else:
+                for symbol, name in self.operation_symbols:
+                    if expression.startswith(symbol, position):
+                        tokens.append(('operator', name, position))
+                        position += len(symbol)
+                        break
+                else:
+                    raise ValueError(f"Unknown symbol in expression: {char}")
+
+        return tokens
+
+
+class _Parser:
+    """Recursive-descent parser that emits a postfix program."""
+
+    def __init__(self, engine: ExpressionEngine, tokens: List[Token]):
+        self.engine = engine
+        self.tokens = tokens
+        self.index = 0
+        self.program: List[Instruction] = []
+
+    def parse(self) -> List[Instruction]:
+        """Parse the whole token list."""
+        if not self.tokens:
+            raise ValueError("Empty expression")
+        self._expression(1)
+        if self.index < len(self.tokens):
+            self._unexpected()
+        return self.program
+
+    def _expression(self, min_precedence: int):
+        """Parse operands joined by operators of at least min_precedence."""
+        self._operand()
+        while self.index < len(self.tokens):
+            kind, name, _ = self.tokens[self.index]
+            if kind != 'operator' or PRECEDENCE[name] < min_precedence:
+                return
+            self.index += 1
+            self._expression(PRECEDENCE[name] + 1)
+            self.program.append((APPLY, name))
+
+    def _operand(self):
+        """Parse a number, a parenthesized expression or a negated operand."""
+        if self.index >= len(self.tokens):
+            raise ValueError("Unexpected end of expression")
+        kind, text, _ = self.tokens[self.index]
+        self.index += 1
+
+        if kind == 'number':
+            self.program.append((PUSH, self.engine.calc.smiley_to_number(text)))
+        elif kind == '(':
+            self._expression(1)
+            if self.index >= len(self.tokens) or self.tokens[self.index][0] != ')':
+                raise ValueError("Missing closing parenthesis")
+            self.index += 1
+        elif kind == 'operator' and text == 'subtract':
+            self._operand()
+            self.program.append((NEGATE, None))
+        else:
+            self.index -= 1
+            self._unexpected()
+
+    def _unexpected(self):
+        """Raise an error for the token at the current position."""
+        _, _, position = self.tokens[self.index]
+        raise ValueError(f"Unexpected symbol at position {position}")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+file_eval.py
+Evaluate huge files of smiley calculations in parallel.
+The input is memory-mapped and split into newline-aligned byte ranges; worker
+processes decode and evaluate each range, and the results are written to the
+output file in input order, one line per input line.
+
+Usage: python file_eval.py INPUT OUTPUT [--jobs N] [--chunk-mb M] [--quiet]
+"""
+
+import argparse
+import mmap
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, Optional, Tuple
+
+from calculator import SmileyCalculator, evaluate_line
+
+# Default size of the byte ranges handed to workers
+DEFAULT_CHUNK_BYTES = 16 * 1024 * 1024
+
+_worker_calc = None
+
+
+def _init_worker():
+    """Create the calculator used by a worker process."""
+    global _worker_calc
+    _worker_calc = SmileyCalculator()
+
+
+def line_aligned_ranges(data: mmap.mmap, chunk_bytes: int) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) byte ranges of about chunk_bytes that end just after a newline."""
+    size = len(data)
+    start = 0
+    while start < size:
+        end = min(start + chunk_bytes, size)
+        if end < size:
+            newline = data.find(b"\n", end - 1)
+            end = size if newline == -1 else newline + 1
+        yield start, end
+        start = end
+
+
+def evaluate_range(path: str, start: int, end: int) -> Tuple[bytes, int]:
+    """Evaluate the lines in one byte range of a file and return (output bytes, line count)."""
+    calc = _worker_calc if _worker_calc is not None else SmileyCalculator()
+    with open(path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        text = data[start:end].decode("utf-8")
+
+    lines = text.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    results = [evaluate_line(calc, line) for line in lines]
+    results.append("")
+    return "\n".join(results).encode("utf-8"), len(lines)
+
+
+def evaluate_file(
+    input_path: str,
+    output_path: str,
+    jobs: Optional[int] = None,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    progress: Optional[Callable[[int, int, int, float], None]] = None,
+) -> Tuple[int, float]:
+    """Evaluate every line of input_path with a process pool and write results to output_path.
+
+    At most two ranges per worker are in flight, so memory stays bounded by the
+    chunk size rather than the file size. progress, if given, is called after
+    each range with (bytes done, total bytes, lines done, elapsed seconds).
+    Returns the number of lines and the elapsed time.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    started = time.perf_counter()
+    total_lines = 0
+
+    with open(input_path, "rb") as handle, open(output_path, "wb") as output:
+        total_bytes = os.fstat(handle.fileno()).st_size
+        if total_bytes == 0:
+            return 0, time.perf_counter() - started
+
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data, ProcessPoolExecutor(
+            max_workers=jobs, initializer=_init_worker
+        ) as executor:
+            pending = deque()
+            for start, end in line_aligned_ranges(data, chunk_bytes):
+                pending.append((end, executor.submit(evaluate_range, input_path, start, end)))
+                while len(pending) >= jobs * 2:
+                    total_lines += _write_next(pending, output, total_bytes, total_lines, started, progress)
+            while pending:
+                total_lines += _write_next(pending, output, total_bytes, total_lines, started, progress)
+
+    return total_lines, time.perf_counter() - started
+
+
+def _write_next(pending: deque, output, total_bytes: int, total_lines: int, started: float, progress) -> int:
+    """Wait for the oldest range, write its results and report progress."""
+    end, future = pending.popleft()
+    chunk, line_count = future.result()
+    output.write(chunk)
+    if progress is not None:
+        progress(end, total_bytes, total_lines + line_count, time.perf_counter() - started)
+    return line_count
+
+
+def print_progress(done_bytes: int, total_bytes: int, lines: int, elapsed: float):
+    """Print a one-line progress and throughput report to stderr."""
+    megabytes = done_bytes / (1024 * 1024)
+    print(
+        f"\r📈 {done_bytes * 100 / total_bytes:5.1f}% | {megabytes:,.1f} MB | {lines:,} lines | "
+        f"{megabytes / elapsed if elapsed else 0:,.1f} MB/s | {lines / elapsed if elapsed else 0:,.0f} lines/s",
+        end="",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="🧮 Evaluate a file of smiley calculations in parallel")
+    parser.add_argument("input", help="file with one calculation or expression per line")
+    parser.add_argument("output", help="file to write one result per line to")
+    parser.add_argument("--jobs", type=int, default=None, metavar="N", help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-mb", type=float, default=DEFAULT_CHUNK_BYTES / (1024 * 1024), metavar="M",
+                        help="size of the ranges handed to workers (default: 16)")
+    parser.add_argument("--quiet", action="store_true", help="do not print progress")
+    args = parser.parse_args(argv)
+
+    lines, elapsed = evaluate_file(
+        args.input,
+        args.output,
+        jobs=args.jobs,
+        chunk_bytes=max(1, int(args.chunk_mb * 1024 * 1024)),
+        progress=None if args.quiet else print_progress,
+    )
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"✅ Evaluated {lines:,} lines in {elapsed:.2f}s ({lines / elapsed if elapsed else 0:,.0f} lines/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
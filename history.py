@@ -0,0 +1,189 @@
+"""
+history.py
+Persistent calculation history for the Smiley Calculator web app.
+Records are appended to an in-memory buffer on the request path and written
+to SQLite (WAL mode) in batched transactions by a background thread, so
+requests never wait for the disk. Queries use keyset pagination over indexed
+(created_at, id) and (operation, created_at, id) columns.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from smiley_codec import number_to_text
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calculations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    operation TEXT NOT NULL,
+    num1 TEXT,
+    num2 TEXT,
+    result TEXT,
+    success INTEGER NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS calculations_time ON calculations (created_at, id);
+CREATE INDEX IF NOT EXISTS calculations_operation_time ON calculations (operation, created_at, id);
+"""
+
+COLUMNS = ("id", "created_at", "operation", "num1", "num2", "result", "success", "error")
+
+# Largest page a single query may return
+MAX_PAGE_SIZE = 1000
+
+
+class HistoryStore:
+    """Buffered, batched SQLite store of served calculations."""
+
+    def __init__(self, path: str, flush_interval: float = 0.5, batch_size: int = 1000, max_buffer: int = 100_000):
+        """Open (or create) the database at path.
+
+        The background thread flushes every flush_interval seconds, or as soon
+        as batch_size records are waiting. At most max_buffer records are held
+        in memory; beyond that new records are dropped and counted.
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self._buffer: List[Tuple] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid = None
+        self._closed = False
+
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        connection.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection in WAL mode."""
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def record(self, operation: str, num1=None, num2=None, result=None, error: Optional[str] = None):
+        """Queue one calculation for writing; never blocks on the database. Records made after close() are dropped."""
+        row = (time.time(), operation, _text(num1), _text(num2), _text(result), int(error is None), error)
+        with self._lock:
+            if self._closed or len(self._buffer) >= self.max_buffer:
+                self.dropped += 1
+                return
+            self._buffer.append(row)
+            pending = len(self._buffer)
+        self._ensure_writer()
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def _ensure_writer(self):
+        """Start the writer thread, again after a fork if needed."""
+        if self._thread_pid != os.getpid() or self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread_pid != os.getpid() or self._thread is None or not self._thread.is_alive():
+                    self._thread_pid = os.getpid()
+                    self._thread = threading.Thread(target=self._writer, name="history-writer", daemon=True)
+                    self._thread.start()
+
+    def _writer(self):
+        """Background loop that writes buffered records in batches."""
+        connection = self._connect()
+        try:
+            while not self._closed:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                self._write_pending(connection)
+            self._write_pending(connection)
+        finally:
+            connection.close()
+
+    def _write_pending(self, connection: sqlite3.Connection):
+        """Write everything currently buffered in one transaction."""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if rows:
+            with connection:
+                connection.executemany(
+                    "INSERT INTO calculations (created_at, operation, num1, num2, result, success, error) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+
+    def flush(self):
+        """Synchronously write everything buffered so far."""
+        connection = self._connect()
+        try:
+            self._write_pending(connection)
+        finally:
+            connection.close()
+
+    def close(self):
+        """Stop the writer thread after a final flush; later records are dropped and counted."""
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None and self._thread_pid == os.getpid():
+            self._thread.join()
+        self.flush()
+
+    def query(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        operation: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Return one page of records in time order and the cursor for the next page.
+
+        start is inclusive and end exclusive (Unix seconds). cursor is the
+        value returned by the previous page; None means there are no more rows.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        clauses, params = [], []
+        if operation is not None:
+            clauses.append("operation = ?")
+            params.append(operation)
+        if start is not None:
+            clauses.append("created_at >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("created_at < ?")
+            params.append(end)
+        if cursor:
+            after_time, after_id = cursor.split(":")
+            clauses.append("(created_at, id) > (?, ?)")
+            params.extend([float(after_time), int(after_id)])
+
+        sql = f"SELECT {', '.join(COLUMNS)} FROM calculations"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created_at, id LIMIT ?"
+        params.append(limit + 1)
+
+        connection = self._connect()
+        try:
+            rows = connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+
+        items = [dict(zip(COLUMNS, row)) for row in rows[:limit]]
+        for item in items:
+            item["success"] = bool(item["success"])
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = f"{last['created_at']!r}:{last['id']}"
+        return items, next_cursor
+
+
+def _text(value) -> Optional[str]:
+    """Store any recorded value as text."""
+    if value is None:
+        return None
+    return number_to_text(value) if type(value) is int else str(value)
@@ -0,0 +1,171 @@
+"""
+metrics.py
+Opt-in instrumentation for the Smiley Calculator web app.
+Set SMILEY_METRICS=1 to count requests and errors, record per-route latency
+histograms and time the decode, compute and encode stages of the calculator.
+Everything is exposed at /metrics in the Prometheus text format. When the
+variable is not set nothing is installed, so the request path is unchanged.
+"""
+
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Tuple
+
+ENABLED = os.environ.get("SMILEY_METRICS", "") == "1"
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative latency histogram with fixed buckets."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, value: float):
+        """Record one observation."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+
+class Registry:
+    """Thread-safe store of counters and histograms keyed by name and labels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[Labels, int]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.help: Dict[str, str] = {}
+
+    def describe(self, name: str, text: str):
+        """Set the HELP text of a metric."""
+        self.help[name] = text
+
+    def increment(self, name: str, **labels: str):
+        """Add one to a counter."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + 1
+
+    def observe(self, name: str, value: float, **labels: str):
+        """Record a value in a histogram."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# HELP {name} {self.help.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f"# HELP {name} {self.help.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                        cumulative += count
+                        bound_text = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound_text),))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+    """Format label pairs as {key="value",...}."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text format."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Created by install(); None means metrics are disabled
+registry = None
+
+
+def record_error(error: Exception):
+    """Count a handled exception by route and type; a no-op when metrics are disabled."""
+    if registry is None:
+        return
+    from flask import has_request_context, request
+
+    route = request.url_rule.rule if has_request_context() and request.url_rule else "none"
+    registry.increment("smiley_errors_total", route=route, exception=type(error).__name__)
+
+
+def _timed(stage: str, func):
+    """Wrap a calculator method so its duration is recorded under a stage label."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            registry.observe("smiley_calculator_stage_seconds", time.perf_counter() - started, stage=stage)
+
+    return wrapper
+
+
+def instrument_calculator(calc):
+    """Time the decode, compute and encode stages of a SmileyCalculator instance."""
+    calc.smiley_to_number = _timed("decode", calc.smiley_to_number)
+    calc.number_to_smiley = _timed("encode", calc.number_to_smiley)
+    for operation_name in calc.operations.values():
+        setattr(calc, operation_name, _timed("compute", getattr(calc, operation_name)))
+
+
+def install(app, calc):
+    """Instrument a Flask app and its calculator and add the /metrics route."""
+    global registry
+    from flask import Response, g, request
+
+    registry = Registry()
+
+    registry.describe("smiley_requests_total", "Requests handled, by route, method and status.")
+    registry.describe("smiley_errors_total", "Exceptions turned into error responses, by route and type.")
+    registry.describe("smiley_request_duration_seconds", "Request latency by route.")
+    registry.describe("smiley_calculator_stage_seconds", "Time spent in calculator decode, compute and encode.")
+
+    instrument_calculator(calc)
+
+    @app.before_request
+    def start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        started = g.get("metrics_started")
+        if started is not None:
+            registry.observe("smiley_request_duration_seconds", time.perf_counter() - started, route=route)
+        registry.increment("smiley_requests_total", route=route, method=request.method, status=str(response.status_code))
+        return response
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        """Prometheus metrics."""
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
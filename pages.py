@@ -0,0 +1,71 @@
+"""
+pages.py
+Pre-rendered, precompressed HTML pages for the Flask app.
+A page is rendered once, kept in memory as identity, gzip and (when the
+brotli package is installed) brotli bodies, and served with strong ETags,
+If-None-Match / 304 handling and long-lived cache headers.
+"""
+
+import gzip
+import hashlib
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# How long browsers and CDNs may reuse a page before revalidating it with its ETag
+PAGE_MAX_AGE = 24 * 60 * 60
+
+
+class PrerenderedPage:
+    """An HTML page rendered on first use and served from memory afterwards."""
+
+    def __init__(self, render: Callable[[], str]):
+        """Wrap a render function; it is called once, inside the first request."""
+        self.render = render
+        self.variants: Optional[Dict[str, Tuple[bytes, str]]] = None
+        self._lock = threading.Lock()
+
+    def build(self) -> Dict[str, Tuple[bytes, str]]:
+        """Render the page and compress it, returning {encoding: (body, etag)}."""
+        with self._lock:
+            if self.variants is None:
+                body = self.render().encode("utf-8")
+                digest = hashlib.sha256(body).hexdigest()[:32]
+                variants = {
+                    "identity": (body, f'"{digest}"'),
+                    "gzip": (gzip.compress(body, compresslevel=9, mtime=0), f'"{digest}-gzip"'),
+                }
+                if brotli is not None:
+                    variants["br"] = (brotli.compress(body, quality=11), f'"{digest}-br"')
+                self.variants = variants
+        return self.variants
+
+    def response(self) -> Response:
+        """Serve the best encoding the client accepts, or 304 when its cached copy is current."""
+        variants = self.variants or self.build()
+
+        encoding = "identity"
+        for candidate in ("br", "gzip"):
+            if candidate in variants and request.accept_encodings[candidate]:
+                encoding = candidate
+                break
+        body, etag = variants[encoding]
+
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={PAGE_MAX_AGE}",
+            "Vary": "Accept-Encoding",
+        }
+        # Only the representation chosen for this request is current; If-None-Match compares weakly
+        if request.if_none_match.contains_weak(etag.strip('"')):
+            return Response(status=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(body, mimetype="text/html", headers=headers)
@@ -0,0 +1,263 @@
+"""
+profiling.py
+Opt-in profiling for the Smiley Calculator web app and CLI.
+
+- SMILEY_PROFILE=0.01 runs cProfile around that fraction of web requests, one
+  at a time, and keeps the merged statistics in
+  $SMILEY_PROFILE_DIR/requests-<pid>.pstats (default directory: profiles/).
+- SMILEY_PROFILE_TOKEN=<secret> adds GET /debug/profile, which captures a
+  time-boxed profile of the live process and returns it. Query parameters:
+  mode=stacks (sampled call stacks in collapsed format, for flame graphs) or
+  mode=memory (tracemalloc allocation growth by line), and seconds (max 60).
+  The token goes in an "Authorization: Bearer <token>" header.
+- calculator.py --profile FILE and --trace-memory FILE wrap a whole CLI run.
+
+When none of this is configured nothing is installed.
+"""
+
+import atexit
+import cProfile
+import hmac
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
+
+SAMPLE_RATE = float(os.environ.get("SMILEY_PROFILE", "0") or 0)
+PROFILE_TOKEN = os.environ.get("SMILEY_PROFILE_TOKEN", "")
+PROFILE_DIR = os.environ.get("SMILEY_PROFILE_DIR", "profiles")
+
+ENABLED = SAMPLE_RATE > 0 or bool(PROFILE_TOKEN)
+
+# Seconds between stack samples of the sampling profiler
+SAMPLE_INTERVAL = 0.005
+
+# Longest capture /debug/profile will run
+MAX_CAPTURE_SECONDS = 60.0
+
+# Sampled requests merged between writes of the request profile
+PROFILE_FLUSH_EVERY = 20
+
+# Frames kept per traced allocation, and allocation sites reported
+TRACEMALLOC_FRAMES = 10
+TOP_ALLOCATIONS = 30
+
+
+class StackSampler:
+    """Sampling profiler that periodically records the call stack of every thread."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL, ignore: Iterable[int] = ()):
+        """Sample every interval seconds, skipping the listed thread idents."""
+        self.interval = interval
+        self.ignore = set(ignore)
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        """Sampling loop, run in the sampler's own thread."""
+        self.ignore.add(threading.get_ident())
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id not in self.ignore:
+                    self.stacks[collapse_stack(frame)] += 1
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        """Stop sampling and return the sample count of each collapsed stack."""
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+
+def collapse_stack(frame) -> str:
+    """Return a stack as 'outer;...;inner' function names, the collapsed flame graph format."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def format_collapsed(stacks: Counter) -> str:
+    """Format stack counts as collapsed-stack lines, busiest first."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def sample_stacks(seconds: float, ignore: Iterable[int] = ()) -> str:
+    """Sample all threads for a number of seconds and return collapsed stacks."""
+    sampler = StackSampler(ignore=ignore).start()
+    time.sleep(seconds)
+    return format_collapsed(sampler.stop())
+
+
+def allocation_growth(seconds: float, limit: int = TOP_ALLOCATIONS) -> str:
+    """Trace allocations for a number of seconds and report the lines whose memory grew most."""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    try:
+        before = tracemalloc.take_snapshot()
+        time.sleep(seconds)
+        after = tracemalloc.take_snapshot()
+    finally:
+        if started:
+            tracemalloc.stop()
+    return format_allocations(after.compare_to(before, "lineno")[:limit])
+
+
+def format_allocations(statistics) -> str:
+    """Format tracemalloc statistics one per line."""
+    return "".join(f"{statistic}\n" for statistic in statistics)
+
+
+def write_file(name: str, text: str, directory: str = PROFILE_DIR) -> str:
+    """Write a profile to the profile directory and return its path."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write(text)
+    return path
+
+
+@contextmanager
+def profile_run(profile_path: Optional[str] = None, memory_path: Optional[str] = None) -> Iterator[None]:
+    """Profile everything inside the block.
+
+    profile_path gets cProfile statistics in pstats format, or sampled
+    collapsed stacks when it ends in .collapsed or .folded. memory_path gets
+    the allocation sites still holding the most memory at the end.
+    """
+    profiler = sampler = None
+    if profile_path and profile_path.endswith((".collapsed", ".folded")):
+        sampler = StackSampler().start()
+    elif profile_path:
+        profiler = cProfile.Profile()
+    if memory_path:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    try:
+        if profiler is not None:
+            profiler.enable()
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        if sampler is not None:
+            with open(profile_path, "w", encoding="utf-8") as handle:
+                handle.write(format_collapsed(sampler.stop()))
+        if memory_path:
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, cProfile.__file__),
+            ])
+            tracemalloc.stop()
+            with open(memory_path, "w", encoding="utf-8") as handle:
+                handle.write(format_allocations(snapshot.statistics("lineno")[:TOP_ALLOCATIONS]))
+
+
+class RequestProfiler:
+    """Runs cProfile around a random sample of requests and merges the results."""
+
+    def __init__(self, rate: float, path: str):
+        self.rate = rate
+        self.path = path
+        self.stats: Optional[pstats.Stats] = None
+        self.pending = 0
+        # cProfile can only profile one request at a time
+        self._busy = threading.Lock()
+        self._merge = threading.Lock()
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """Begin profiling the current request if it is sampled and no other request is profiled."""
+        if random.random() >= self.rate or not self._busy.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler, such as a debugger, is active
+            self._busy.release()
+            return None
+        return profiler
+
+    def finish(self, profiler: cProfile.Profile):
+        """Stop a request's profiler and merge it, writing the file every few samples."""
+        profiler.disable()
+        self._busy.release()
+        with self._merge:
+            if self.stats is None:
+                self.stats = pstats.Stats(profiler)
+            else:
+                self.stats.add(profiler)
+            self.pending += 1
+            if self.pending >= PROFILE_FLUSH_EVERY:
+                self.flush()
+
+    def flush(self):
+        """Write the merged statistics collected so far."""
+        if self.stats is not None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.stats.dump_stats(self.path)
+            self.pending = 0
+
+
+def authorized(header: str, token: str = PROFILE_TOKEN) -> bool:
+    """Check an Authorization header against the profile token in constant time."""
+    scheme, _, supplied = header.partition(" ")
+    return bool(token) and scheme.lower() == "bearer" and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def install(app):
+    """Add request sampling and /debug/profile to a Flask app as configured."""
+    from flask import Response, g, request
+
+    if SAMPLE_RATE > 0:
+        request_profiler = RequestProfiler(SAMPLE_RATE, os.path.join(PROFILE_DIR, f"requests-{os.getpid()}.pstats"))
+        atexit.register(request_profiler.flush)
+
+        @app.before_request
+        def start_profile():
+            g.profiler = request_profiler.start()
+
+        @app.teardown_request
+        def finish_profile(_):
+            profiler = g.pop("profiler", None)
+            if profiler is not None:
+                request_profiler.finish(profiler)
+
+    if PROFILE_TOKEN:
+        capture_lock = threading.Lock()
+
+        @app.route("/debug/profile")
+        def debug_profile():
+            """Capture a time-boxed profile of this process."""
+            if not authorized(request.headers.get("Authorization", "")):
+                return Response("Unauthorized\n", status=401, mimetype="text/plain", headers={"WWW-Authenticate": "Bearer"})
+            mode = request.args.get("mode", "stacks")
+            if mode not in ("stacks", "memory"):
+                return Response("mode must be stacks or memory\n", status=400, mimetype="text/plain")
+            seconds = min(max(request.args.get("seconds", default=5.0, type=float), 0.1), MAX_CAPTURE_SECONDS)
+            if not capture_lock.acquire(blocking=False):
+                return Response("A capture is already running\n", status=409, mimetype="text/plain")
+            try:
+                if mode == "stacks":
+                    text = sample_stacks(seconds, ignore=[threading.get_ident()])
+                    name = f"stacks-{os.getpid()}-{int(time.time())}.collapsed"
+                else:
+                    text = allocation_growth(seconds)
+                    name = f"allocations-{os.getpid()}-{int(time.time())}.txt"
+            finally:
+                capture_lock.release()
+            path = write_file(name, text)
+            return Response(text, mimetype="text/plain", headers={"X-Profile-File": path})
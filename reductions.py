@@ -0,0 +1,179 @@
+"""
+reductions.py
+Single-pass aggregate reductions over streams of numbers for the Smiley Calculator.
+Values are consumed one at a time with O(1) state, so sequences of any length
+can be reduced without holding them in memory or re-encoding running totals.
+Integers are accumulated exactly; floats use Neumaier-compensated summation
+and Welford's method for the variance. The int and float parts are combined
+only for the result, so ints too large for a float stay exact.
+"""
+
+import math
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Union
+
+from smiley_codec import FLOAT_EXACT_LIMIT
+
+if TYPE_CHECKING:
+    from fractions import Fraction
+
+Number = Union[int, float]
+
+# Reductions in the order they are reported
+REDUCTIONS = ('sum', 'product', 'mean', 'min', 'max', 'variance')
+
+
+class Reducer:
+    """Accumulates the requested reductions of a stream of ints and floats."""
+
+    def __init__(self, operations: Iterable[str] = REDUCTIONS):
+        """Track only the given reductions (names from REDUCTIONS)."""
+        self.operations = tuple(operations)
+        unknown = [name for name in self.operations if name not in REDUCTIONS]
+        if unknown:
+            raise ValueError(f"Unknown reduction: {unknown[0]}")
+        self.track_product = 'product' in self.operations
+        self.track_extremes = 'min' in self.operations or 'max' in self.operations
+        self.track_variance = 'variance' in self.operations
+
+        self.count = 0
+        # Exact sum and sum of squares of the ints, and the product of the ints
+        self.int_sum = 0
+        self.int_squares = 0
+        self.int_product = 1
+        # Compensated float sum: running total and accumulated rounding error
+        self.float_sum = 0.0
+        self.compensation = 0.0
+        self.float_product = 1.0
+        self.has_floats = False
+        # Welford state, used once a float arrives
+        self.welford_mean = 0.0
+        self.welford_m2 = 0.0
+        self.minimum: Optional[Number] = None
+        self.maximum: Optional[Number] = None
+
+    def add(self, value: Number):
+        """Fold one value into every tracked reduction."""
+        if type(value) is not int:
+            if not self.has_floats:
+                self._start_floats()
+            value = float(value)
+            total = self.float_sum + value
+            if abs(self.float_sum) >= abs(value):
+                self.compensation += (self.float_sum - total) + value
+            else:
+                self.compensation += (value - total) + self.float_sum
+            self.float_sum = total
+            if self.track_product:
+                self.float_product *= value
+        else:
+            self.int_sum += value
+            if self.track_variance and not self.has_floats:
+                self.int_squares += value * value
+            if self.track_product:
+                self.int_product *= value
+
+        self.count += 1
+        if self.track_variance and self.has_floats and self.welford_m2 is not None:
+            try:
+                delta = value - self.welford_mean
+                self.welford_mean += delta / self.count
+                self.welford_m2 += delta * (value - self.welford_mean)
+            except OverflowError:
+                self.welford_m2 = None
+        if self.track_extremes:
+            if self.minimum is None or value < self.minimum:
+                self.minimum = value
+            if self.maximum is None or value > self.maximum:
+                self.maximum = value
+
+    def update(self, values: Iterable[Number]) -> 'Reducer':
+        """Fold every value of an iterable, consuming it lazily."""
+        add = self.add
+        for value in values:
+            add(value)
+        return self
+
+    def _start_floats(self):
+        """Switch the variance to Welford's method, seeded exactly from the ints so far."""
+        self.has_floats = True
+        if self.track_variance and self.count:
+            try:
+                self.welford_mean = self.int_sum / self.count
+                self.welford_m2 = (self.count * self.int_squares - self.int_sum * self.int_sum) / self.count
+            except OverflowError:
+                # Welford's method runs in floats; these ints are out of their range
+                self.welford_m2 = None
+
+    def result(self, operation: str) -> Number:
+        """Return one tracked reduction of the values so far."""
+        if operation not in self.operations:
+            raise ValueError(f"Reduction not tracked: {operation}")
+        if operation == 'sum':
+            return self._sum()
+        if operation == 'product':
+            if self.has_floats:
+                if abs(self.int_product) < FLOAT_EXACT_LIMIT:
+                    return self.int_product * self.float_product
+                if not math.isfinite(self.float_product):
+                    raise ValueError("Product is out of the float range")
+                return round(_fraction(self.float_product) * self.int_product)
+            return self.int_product
+        if not self.count:
+            raise ValueError(f"Cannot compute the {operation} of no values")
+        if operation == 'mean':
+            if not self.has_floats:
+                return _exact_quotient(self.int_sum, self.count)
+            if abs(self.int_sum) < FLOAT_EXACT_LIMIT:
+                return self._sum() / self.count
+            return round(self._exact_sum() / self.count)
+        if operation == 'min':
+            return self.minimum
+        if operation == 'max':
+            return self.maximum
+        if self.has_floats:
+            if self.welford_m2 is None:
+                raise ValueError("Variance is out of the float range")
+            return max(self.welford_m2 / self.count, 0.0)
+        return _exact_quotient(self.count * self.int_squares - self.int_sum * self.int_sum, self.count * self.count)
+
+    def results(self) -> Dict[str, Number]:
+        """Return every tracked reduction by name."""
+        return {operation: self.result(operation) for operation in self.operations}
+
+    def _sum(self) -> Number:
+        """Exact int sum plus the compensated float sum.
+
+        The result is a float, or the nearest int once the int part is beyond
+        the range where floats hold every integer.
+        """
+        if not self.has_floats:
+            return self.int_sum
+        if abs(self.int_sum) < FLOAT_EXACT_LIMIT:
+            return self.int_sum + (self.float_sum + self.compensation)
+        return round(self._exact_sum())
+
+    def _exact_sum(self) -> 'Fraction':
+        """Exact int sum plus the compensated float sum, as a Fraction."""
+        if not math.isfinite(self.float_sum):
+            raise ValueError("Sum is out of the float range")
+        return _fraction(self.float_sum) + _fraction(self.compensation) + self.int_sum
+
+
+def _fraction(value: float) -> 'Fraction':
+    """Return a float as an exact Fraction; fractions is imported on first use to keep startup short."""
+    from fractions import Fraction
+
+    return Fraction(value)
+
+
+def _exact_quotient(numerator: int, denominator: int) -> Number:
+    """Divide ints by a positive int as exactly as the result types allow.
+
+    Even quotients are ints; others are the correctly rounded float, or the
+    nearest int once floats can no longer hold every integer in range.
+    """
+    if numerator % denominator == 0:
+        return numerator // denominator
+    if abs(numerator) >= FLOAT_EXACT_LIMIT * denominator:
+        return (2 * numerator + denominator) // (2 * denominator)
+    return numerator / denominator
@@ -0,0 +1,338 @@
+"""
+smiley_codec.py
+Table-driven conversion between smiley digit strings and numbers.
+Digits are translated in one pass with precomputed str.maketrans tables and the
+numeric work is left to int() and str(), instead of looping over characters.
+
+Digit alphabets are kept in a registry by name. Each alphabet's base is its
+number of digits; its codec is compiled on first use and then shared by every
+calculator that uses the alphabet.
+"""
+
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Union
+
+# decimal is only needed for huge integers and is imported on first use
+if TYPE_CHECKING:
+    import decimal
+
+# Characters that str() can produce for an int or float besides digits, '.' and '-'
+FLOAT_STR_EXTRAS = 'e+infa'
+
+# Digit count above which conversions switch to divide-and-conquer (below CPython's 4300 limit)
+BIG_NUMBER_DIGITS = 3000
+
+# Bit width of the pieces that are converted directly when encoding big integers
+BIG_NUMBER_BITS = 8192
+
+# Largest magnitude up to which every integer is exactly representable as a float
+FLOAT_EXACT_LIMIT = 2 ** 53
+
+# Marker that ASCII digits are translated to, so they are not mistaken for smilies
+INVALID_DIGIT = '\ufffd'
+
+# Characters int() reads as digits, in value order; bases up to 36 decode through them
+BASE_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+# Largest digit count converted digit by digit before splitting, for bases int() cannot read
+SMALL_DIGIT_COUNT = 32
+
+# Fractional digits are encoded until this many bits of precision (a float's 53 plus margin)
+FRACTION_BITS = 56
+
+# Name of the alphabet calculators use unless told otherwise
+DEFAULT_ALPHABET = 'faces'
+
+# Built-in digit alphabets; every digit is a single code point and the base is the digit count
+ALPHABETS: Dict[str, str] = {
+    # Grinning, smiling, beaming, tears of joy, big eyes, smiling eyes, squinting, halo, horns, winking
+    'faces': '😀😊😁😂😃😄😆😇😈😉',
+    'animals': '🐶🐱🐭🐹🐰🦊🐻🐼🐨🐯',
+    'hex': '😀😊😁😂😃😄😆😇😈😉😋😌😍😎😏😐',
+    # The first sixty code points of the Emoticons block, in code point order
+    'sexagesimal': ''.join(chr(code) for code in range(0x1F600, 0x1F600 + 60)),
+}
+
+
+class SmileyCodec:
+    """Precompiled translation tables for a smiley digit alphabet."""
+
+    def __init__(self, numbers: Dict[str, int]):
+        """Compile decode and encode tables from a smiley-to-digit mapping.
+
+        The base is the number of smilies, whose digits must be 0 to base - 1.
+        """
+        self.numbers = dict(numbers)
+        self.base = len(self.numbers)
+        if self.base < 2 or sorted(self.numbers.values()) != list(range(self.base)):
+            raise ValueError("An alphabet needs at least two digits numbered 0 to base - 1")
+        if any(len(smiley) != 1 or smiley in '.➖' for smiley in self.numbers):
+            raise ValueError("Digits must be single characters other than '.' and '➖'")
+        self.reverse_numbers = {digit: smiley for smiley, digit in self.numbers.items()}
+        self.digit_smileys = tuple(self.reverse_numbers[digit] for digit in range(self.base))
+
+        # Digit characters the translated text is read with: int()'s digits, or code points 0..base-1
+        if self.base <= len(BASE_DIGITS):
+            self.digit_chars = BASE_DIGITS[:self.base]
+        else:
+            self.digit_chars = ''.join(chr(digit) for digit in range(self.base))
+        self.digit_check_table = str.maketrans('', '', self.digit_chars)
+
+        # Decoding: smiley -> digit character, '.' is ignored and raw digit characters are rejected
+        decode_map = {char: INVALID_DIGIT for char in self.digit_chars + self.digit_chars.upper()}
+        decode_map.update({smiley: self.digit_chars[digit] for smiley, digit in self.numbers.items()})
+        decode_map['.'] = None
+        self.decode_table = str.maketrans(decode_map)
+
+        # Numerals: like decoding, but the decimal point is kept for float parsing
+        numeral_map = dict(decode_map)
+        numeral_map['.'] = '.'
+        self.numeral_table = str.maketrans(numeral_map)
+
+        # Encoding: digit character -> smiley, '-' -> minus smiley, float notation is dropped
+        encode_map = {BASE_DIGITS[digit]: smiley for digit, smiley in enumerate(self.digit_smileys[:36])}
+        encode_map['-'] = '➖'
+        if self.base == 10:
+            encode_map.update({char: None for char in FLOAT_STR_EXTRAS})
+        self.encode_table = str.maketrans(encode_map)
+
+    def decode_digits(self, smiley_string: str) -> int:
+        """Convert smiley digits to an integer."""
+        digits = smiley_string.translate(self.decode_table)
+        if self.base != 10:
+            return self._decode_base_digits(smiley_string, digits)
+        if not digits.isascii() or not digits.isdigit():
+            if not digits:
+                return 0
+            self._raise_unknown_digit(smiley_string)
+        if len(digits) > BIG_NUMBER_DIGITS:
+            return digits_to_int(digits)
+        return int(digits)
+
+    def _decode_base_digits(self, smiley_string: str, digits: str) -> int:
+        """Convert translated digit characters of a non-decimal alphabet to an integer."""
+        if not digits:
+            return 0
+        if digits.translate(self.digit_check_table):
+            self._raise_unknown_digit(smiley_string)
+        if self.base > len(BASE_DIGITS):
+            return values_to_int(digits.encode('latin-1'), self.base)
+        if len(digits) > BIG_NUMBER_DIGITS:
+            return digits_to_int(digits, self.base)
+        return int(digits, self.base)
+
+    def decode(self, smiley_string: str) -> Union[int, float]:
+        """Convert a string of smiley digits, optionally with a decimal point, to a number."""
+        if not smiley_string:
+            return 0
+
+        if '.' in smiley_string:
+            integer_part, decimal_part = smiley_string.split('.')
+            integer_value = self.decode_digits(integer_part)
+            decimal_value = self.decode_digits(decimal_part)
+            return integer_value + decimal_value / (self.base ** len(decimal_part))
+        return self.decode_digits(smiley_string)
+
+    def encode(self, number: Union[int, float]) -> str:
+        """Convert a number to its smiley representation."""
+        if number == int(number):
+            number = int(number)
+
+        if self.base != 10:
+            return self._encode_base(number)
+
+        if type(number) is int and abs(number).bit_length() > BIG_NUMBER_BITS:
+            return int_to_digits(number).translate(self.encode_table)
+
+        number_str = str(number)
+        if type(number) in (int, float):
+            return number_str.translate(self.encode_table)
+        return self._encode_generic(number_str)
+
+    def _encode_base(self, number: Union[int, float]) -> str:
+        """Encode a number in a non-decimal alphabet.
+
+        Fractions are written until they end or FRACTION_BITS of precision
+        have been produced, so binary floats do not expand to hundreds of digits.
+        """
+        sign = '➖' if number < 0 else ''
+        number = abs(number)
+        integer = int(number)
+        if self.base in (2, 8, 16):
+            text = sign + format(integer, {2: 'b', 8: 'o', 16: 'x'}[self.base]).translate(self.encode_table)
+        else:
+            text = sign + ''.join(map(self.digit_smileys.__getitem__, int_to_values(integer, self.base)))
+        if type(number) is int:
+            return text
+
+        # Exact fraction digits from the float's integer ratio; leading zeros add no precision
+        numerator, denominator = number.as_integer_ratio()
+        numerator -= integer * denominator
+        fraction, precision = [], 1
+        while numerator and precision < 2 ** FRACTION_BITS:
+            digit, numerator = divmod(numerator * self.base, denominator)
+            fraction.append(digit)
+            if digit or precision > 1:
+                precision *= self.base
+        return text + '.' + ''.join(map(self.digit_smileys.__getitem__, fraction))
+
+    def _encode_generic(self, number_str: str) -> str:
+        """Encode the str() of an arbitrary number type character by character."""
+        smiley_digits = {digit: smiley for smiley, digit in self.numbers.items()}
+        smiley_result = []
+        for char in number_str:
+            if char.isdigit():
+                smiley_result.append(smiley_digits[int(char)])
+            elif char == '.':
+                smiley_result.append('.')
+            elif char == '-':
+                smiley_result.append('➖')
+        return ''.join(smiley_result)
+
+    def _raise_unknown_digit(self, smiley_string: str):
+        """Raise the error for the first character that is not a smiley digit."""
+        for smiley in smiley_string:
+            if smiley not in self.numbers and smiley != '.':
+                raise ValueError(f"Unknown smiley digit: {smiley}")
+
+
+# Registered alphabets and their compiled codecs, shared by every calculator
+_alphabets: Dict[str, str] = dict(ALPHABETS)
+_codecs: Dict[str, SmileyCodec] = {}
+_registry_lock = threading.Lock()
+
+
+def register_alphabet(name: str, digits: str):
+    """Add (or replace) a named alphabet; its base is the number of digits.
+
+    The codec is compiled immediately, so an invalid alphabet is rejected here.
+    """
+    if len(set(digits)) != len(digits):
+        raise ValueError("Alphabet digits must be distinct")
+    codec = SmileyCodec({smiley: digit for digit, smiley in enumerate(digits)})
+    with _registry_lock:
+        _alphabets[name] = digits
+        _codecs[name] = codec
+
+
+def get_codec(name: str = DEFAULT_ALPHABET) -> SmileyCodec:
+    """Return the shared codec for a registered alphabet, compiling it on first use."""
+    codec = _codecs.get(name)
+    if codec is None:
+        with _registry_lock:
+            if name not in _alphabets:
+                raise ValueError(f"Unknown alphabet: {name}")
+            codec = _codecs.get(name)
+            if codec is None:
+                digits = _alphabets[name]
+                codec = _codecs[name] = SmileyCodec({smiley: digit for digit, smiley in enumerate(digits)})
+    return codec
+
+
+def alphabet_names() -> List[str]:
+    """Return the names of all registered alphabets."""
+    return sorted(_alphabets)
+
+
+@lru_cache(maxsize=None)
+def _power(base: int, exponent: int) -> int:
+    """Return base ** exponent, cached because the split points repeat."""
+    return base ** exponent
+
+
+@lru_cache(maxsize=None)
+def _big_number_context() -> 'decimal.Context':
+    """Return the exact decimal arithmetic context used to build the digits of big integers."""
+    import decimal
+
+    return decimal.Context(prec=decimal.MAX_PREC, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN, traps=[decimal.Inexact])
+
+
+@lru_cache(maxsize=None)
+def _decimal_power_of_two(exponent: int) -> 'decimal.Decimal':
+    """Return 2 ** exponent as an exact Decimal, cached because the split points repeat."""
+    import decimal
+
+    with decimal.localcontext(_big_number_context()):
+        return decimal.Decimal(2) ** exponent
+
+
+def digits_to_int(digits: str, base: int = 10) -> int:
+    """Convert a digit string of any length to an int by divide and conquer.
+
+    The string is split in half and the halves are joined with one big
+    multiplication, so the cost follows integer multiplication (Karatsuba,
+    about n^1.58) instead of growing quadratically like digit-by-digit
+    accumulation.
+    """
+    if len(digits) <= BIG_NUMBER_DIGITS:
+        return int(digits, base)
+    # Split on a power-of-two multiple of the base size so the powers are reused
+    low_length = BIG_NUMBER_DIGITS
+    while low_length * 2 < len(digits):
+        low_length *= 2
+    high, low = digits[:-low_length], digits[-low_length:]
+    return digits_to_int(high, base) * _power(base, low_length) + digits_to_int(low, base)
+
+
+def values_to_int(values: bytes, base: int) -> int:
+    """Convert digit values (most significant first) in any base to an int by divide and conquer."""
+    if len(values) <= SMALL_DIGIT_COUNT:
+        number = 0
+        for value in values:
+            number = number * base + value
+        return number
+    low_length = SMALL_DIGIT_COUNT
+    while low_length * 2 < len(values):
+        low_length *= 2
+    high, low = values[:-low_length], values[-low_length:]
+    return values_to_int(high, base) * _power(base, low_length) + values_to_int(low, base)
+
+
+def int_to_values(number: int, base: int) -> List[int]:
+    """Return the digit values of a non-negative int in any base, most significant first."""
+    if number < _power(base, SMALL_DIGIT_COUNT):
+        values = []
+        while number:
+            number, value = divmod(number, base)
+            values.append(value)
+        return values[::-1] or [0]
+    # Split on a power-of-two digit count so the powers are reused
+    low_length = SMALL_DIGIT_COUNT
+    while _power(base, low_length * 2) <= number:
+        low_length *= 2
+    high, low = divmod(number, _power(base, low_length))
+    low_values = int_to_values(low, base)
+    return int_to_values(high, base) + [0] * (low_length - len(low_values)) + low_values
+
+
+def int_to_digits(number: int) -> str:
+    """Convert an int of any size to its decimal digit string by divide and conquer.
+
+    The value is split on bit boundaries, which is linear, and the halves are
+    recombined with exact Decimal arithmetic, whose large multiplications are
+    subquadratic. This also avoids the interpreter's int-to-str digit limit.
+    """
+    import decimal
+
+    if number < 0:
+        return '-' + int_to_digits(-number)
+
+    def convert(value: int, bits: int) -> 'decimal.Decimal':
+        if bits <= BIG_NUMBER_BITS:
+            return decimal.Decimal(value)
+        low_bits = bits >> 1
+        high = value >> low_bits
+        low = value - (high << low_bits)
+        return convert(high, bits - low_bits) * _decimal_power_of_two(low_bits) + convert(low, low_bits)
+
+    with decimal.localcontext(_big_number_context()):
+        return str(convert(number, number.bit_length()))
+
+
+def number_to_text(number: Union[int, float]) -> str:
+    """Return str(number), converting ints too long for str() with int_to_digits."""
+    if type(number) is int and abs(number).bit_length() > BIG_NUMBER_BITS:
+        return int_to_digits(number)
+    return str(number)
@@ -2,13 +2,35 @@
 """
 start_web.py
 Easy startup script for the Smiley Calculator web application
+
+Without options the Flask development server starts on 127.0.0.1:5000 and a
+browser is opened. With --production a supervisor process forks worker
+processes that serve the app from one shared listening socket (or, with
+--reuse-port, one SO_REUSEPORT socket each). Crashed workers are restarted,
+SIGHUP replaces every worker without dropping the socket, and SIGTERM or
+Ctrl+C stops them after in-flight requests finish.
+
+Usage: python start_web.py --production [--workers N] [--bind HOST:PORT] [--backlog N]
 """
 
+import argparse
 import webbrowser
 import time
 import threading
 import os
-from app import app
+import signal
+import socket
+import sys
+from typing import Dict, List, Optional
+
+from werkzeug.serving import ThreadedWSGIServer, WSGIRequestHandler
+
+# Workers that exit sooner than this after starting are restarted only after RESTART_DELAY
+MIN_WORKER_LIFETIME = 1.0
+RESTART_DELAY = 1.0
+
+# How often the supervisor checks for signals and exited workers, in seconds
+SUPERVISOR_POLL_INTERVAL = 0.1
 
 
 def open_browser():
@@ -17,8 +39,234 @@ def open_browser():
     webbrowser.open("http://127.0.0.1:5000")
 
 
-def main():
+class QuietRequestHandler(WSGIRequestHandler):
+    """Request handler without the per-request access log line."""
+
+    def log_request(self, code="-", size="-"):
+        pass
+
+
+class WorkerServer(ThreadedWSGIServer):
+    """Threaded WSGI server on a listening socket shared with other workers.
+
+    Connections are counted from accept until closed (the server sends one
+    response per connection), so a stopping worker can wait for them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.active = 0
+        self.idle = threading.Condition()
+
+    def get_request(self):
+        # Another worker may win the race for a connection; socketserver ignores the BlockingIOError
+        connection, address = self.socket.accept()
+        connection.setblocking(True)
+        return connection, address
+
+    def process_request(self, request, client_address):
+        with self.idle:
+            self.active += 1
+        super().process_request(request, client_address)
+
+    def shutdown_request(self, request):
+        super().shutdown_request(request)
+        with self.idle:
+            self.active -= 1
+            self.idle.notify_all()
+
+    def wait_idle(self, timeout: float) -> bool:
+        """Wait until every accepted connection is closed; False if the timeout expired first."""
+        with self.idle:
+            return self.idle.wait_for(lambda: self.active == 0, timeout)
+
+
+def parse_bind(bind: str):
+    """Split HOST:PORT (IPv6 hosts in brackets) into a host and an int port."""
+    host, _, port = bind.rpartition(":")
+    return host.strip("[]") or "127.0.0.1", int(port)
+
+
+def create_listener(host: str, port: int, backlog: int, reuse_port: bool = False) -> socket.socket:
+    """Bind and listen on a TCP socket."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    listener = socket.socket(family, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    listener.bind((host, port))
+    listener.listen(backlog)
+    listener.setblocking(False)
+    return listener
+
+
+def run_worker(listener: Optional[socket.socket], args: argparse.Namespace):
+    """Serve the app in a worker process until SIGTERM, then drain in-flight requests."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    host, port = parse_bind(args.bind)
+    if listener is None:
+        listener = create_listener(host, port, args.backlog, reuse_port=True)
+
+    # Imported after the fork so that a reload picks up new code
+    from app import app
+
+    handler = WSGIRequestHandler if args.access_log else QuietRequestHandler
+    server = WorkerServer(host, port, app, handler, fd=listener.fileno())
+    listener.close()
+
+    def stop(*_):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    def watch_supervisor(supervisor_pid: int):
+        while os.getppid() == supervisor_pid:
+            time.sleep(1)
+        stop()
+
+    signal.signal(signal.SIGTERM, stop)
+    threading.Thread(target=watch_supervisor, args=(os.getppid(),), daemon=True).start()
+
+    server.serve_forever()
+    server.socket.close()
+    server.wait_idle(args.graceful_timeout)
+
+
+class Supervisor:
+    """Forks and watches the worker processes of the production server."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.listener: Optional[socket.socket] = None
+        self.workers: Dict[int, float] = {}
+        self.retiring: Dict[int, float] = {}
+        self.signals: List[int] = []
+        self.stopping = False
+        self.restart_at = 0.0
+
+    def spawn(self):
+        """Fork one worker of the current generation."""
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                run_worker(self.listener, self.args)
+            except BaseException as e:
+                print(f"❌ Worker {os.getpid()} failed: {e}", file=sys.stderr)
+                status = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(status)
+        self.workers[pid] = time.monotonic()
+        print(f"👷 Worker {pid} started", flush=True)
+
+    def retire(self, pids, deadline: float):
+        """Ask workers to stop after their in-flight requests, killing them at the deadline."""
+        for pid in pids:
+            self.retiring[pid] = deadline
+            self._signal(pid, signal.SIGTERM)
+
+    def reload(self):
+        """Start a new generation of workers, then retire the old one."""
+        print("🔄 Reloading workers...", flush=True)
+        old = list(self.workers)
+        self.workers = {}
+        for _ in range(self.args.workers):
+            self.spawn()
+        self.retire(old, time.monotonic() + self.args.graceful_timeout)
+
+    def stop(self):
+        """Retire every worker and exit once they are gone."""
+        print("🛑 Stopping workers...", flush=True)
+        self.stopping = True
+        old = list(self.workers)
+        self.workers = {}
+        self.retire(old, time.monotonic() + self.args.graceful_timeout)
+
+    def reap(self):
+        """Collect exited workers and replace the ones that were not asked to stop."""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self.retiring.pop(pid, None)
+            started = self.workers.pop(pid, None)
+            if started is not None:
+                print(f"💥 Worker {pid} exited unexpectedly (status {status}), restarting", file=sys.stderr, flush=True)
+                if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                    self.restart_at = time.monotonic() + RESTART_DELAY
+
+    def run(self) -> int:
+        """Bind, fork the workers and supervise them until stopped."""
+        host, port = parse_bind(self.args.bind)
+        if not self.args.reuse_port:
+            self.listener = create_listener(host, port, self.args.backlog)
+
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda signum, _: self.signals.append(signum))
+
+        print(f"🚀 Serving the Smiley Calculator on http://{self.args.bind} with {self.args.workers} workers", flush=True)
+        print("🔄 Send SIGHUP to reload, SIGTERM or Ctrl+C to stop", flush=True)
+        for _ in range(self.args.workers):
+            self.spawn()
+
+        while self.workers or self.retiring:
+            while self.signals:
+                signum = self.signals.pop(0)
+                if signum == signal.SIGHUP and not self.stopping:
+                    self.reload()
+                elif signum != signal.SIGHUP and not self.stopping:
+                    self.stop()
+
+            self.reap()
+            now = time.monotonic()
+            for pid, deadline in list(self.retiring.items()):
+                if now > deadline:
+                    self._signal(pid, signal.SIGKILL)
+            while not self.stopping and len(self.workers) < self.args.workers and now >= self.restart_at:
+                self.spawn()
+            time.sleep(SUPERVISOR_POLL_INTERVAL)
+
+        if self.listener is not None:
+            self.listener.close()
+        print("👋 All workers stopped", flush=True)
+        return 0
+
+    @staticmethod
+    def _signal(pid: int, signum: int):
+        """Send a signal to a worker that may already have exited."""
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse the command-line options."""
+    parser = argparse.ArgumentParser(description="🚀 Start the Smiley Calculator web app")
+    parser.add_argument("--production", action="store_true", help="serve with multiple worker processes instead of the development server")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes (default: CPU count)")
+    parser.add_argument("--bind", default="127.0.0.1:5000", help="HOST:PORT to listen on (default: 127.0.0.1:5000)")
+    parser.add_argument("--backlog", type=int, default=2048, help="listen queue length (default: 2048)")
+    parser.add_argument("--reuse-port", action="store_true", help="give each worker its own SO_REUSEPORT socket so the kernel balances connections")
+    parser.add_argument("--graceful-timeout", type=float, default=30.0, help="seconds a stopping worker may spend finishing requests (default: 30)")
+    parser.add_argument("--access-log", action="store_true", help="log every request in production mode")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
     """Start the web application and open browser."""
+    args = parse_arguments(argv)
+    if args.production:
+        if not hasattr(os, "fork"):
+            sys.exit("❌ Production mode needs a POSIX system (os.fork)")
+        sys.exit(Supervisor(args).run())
+
     print("🚀 Starting Smiley Calculator Web App...")
     print("🌐 Opening browser automatically...")
     print("✨ Enjoy calculating with smilies!")
@@ -30,6 +278,8 @@ def main():
     browser_thread.start()
 
     # Start Flask app
+    from app import app
+
     try:
         app.run(debug=False, host="127.0.0.1", port=5000)
     except KeyboardInterrupt:
@@ -4,7 +4,29 @@ Test script for the Smiley Calculator
 Tests core functionality to ensure everything works properly.
 """
 
-from calculator import SmileyCalculator
+import io
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import pytest
+
+from calculator import SmileyArray, SmileyCalculator, SmileyNumber, batch_mode, evaluate_line, format_calculation, format_calculation_display
+from file_eval import evaluate_file
+
+# Most a one-shot `calculator.py -e` run may take beyond starting a bare interpreter, in seconds
+COLD_START_BUDGET = 0.5
+
+
+def assert_raises_each(cases, exception=ValueError):
+    """Assert that each (call, message) case raises exception with exactly that message; None accepts any message."""
+    for call, message in cases:
+        with pytest.raises(exception, match=None if message is None else f"^{re.escape(message)}$"):
+            call()
 
 
 def test_calculator():
@@ -84,5 +106,423 @@ def test_calculator():
     print("\n🎉 Testing completed! The Smiley Calculator is ready to use! 🎉")
 
 
+def test_calculate_batch():
+    """Test that batch calculations match single calculations."""
+    calc = SmileyCalculator()
+
+    print("🧪 Testing batch calculations...\n")
+
+    batch = [
+        ("😁", "➕", "😃"),
+        ("😈", "➖", "😃"),
+        ("😁", "✖️", "😄"),
+        ("😉", "➗", "😃"),
+        ("😊", "➗", "😀"),
+        ("🙂", "➕", "😊"),
+        ("😊", "🤔", "😁"),
+        ("😉" * 20, "✖️", "😉" * 20),
+    ]
+
+    results, errors = calc.calculate_batch(batch)
+
+    for (num1, op, num2), result, error in zip(batch, results, errors):
+        try:
+            expected = calc.calculate(num1, op, num2)
+        except ValueError as e:
+            assert result is None and error == str(e), f"{num1} {op} {num2}: {error} (expected {e})"
+        else:
+            assert result == expected and error is None, f"{num1} {op} {num2} = {result} (expected {expected})"
+
+
+def test_calculate_detailed():
+    """Test that calculate_detailed agrees with calculate and reports the regular numbers."""
+    calc = SmileyCalculator()
+
+    print("🧪 Testing detailed calculations...\n")
+
+    cases = [
+        (("😊😀", "➕", "😃"), 14),
+        (("😈", "➗", "😃"), 2),
+        (("😊", "➗", "😃"), 0.25),
+        (("😁", "➖", "😄"), -3),
+    ]
+    for (num1, op, num2), expected in cases:
+        calculation = calc.calculate_detailed(num1, op, num2)
+        assert (
+            calculation["result"] == calc.calculate(num1, op, num2)
+            and calculation["result_regular"] == expected
+            and type(calculation["result_regular"]) is type(expected)
+            and calculation["num1_regular"] == calc.smiley_to_number(num1)
+            and calculation["operation_name"] == calc.operations[op]
+        ), f"{num1} {op} {num2} = {calculation['result']} ({calculation['result_regular']})"
+        display = format_calculation_display(num1, op, num2, calculation["result"], calc)
+        assert display == format_calculation(calculation), "Both display forms agree"
+
+    number = SmileyNumber(calc, value=2.0)
+    assert number.value == 2 and type(number.value) is int and str(number) == "😁" and not hasattr(number, "__dict__"), "SmileyNumber stores whole floats as ints"
+
+    assert_raises_each([(lambda: calc.calculate_detailed("😊", "➗", "😀"), "Calculation error: Cannot divide by zero! 🚫")])
+
+
+def test_codec_validation():
+    """Test that the table-driven codec keeps the original validation rules."""
+    calc = SmileyCalculator()
+
+    print("🧪 Testing codec validation...\n")
+
+    assert_raises_each([
+        (lambda: calc.smiley_to_number("😊5"), "Unknown smiley digit: 5"),
+        (lambda: calc.smiley_to_number("😊a😁"), "Unknown smiley digit: a"),
+        (lambda: calc.smiley_to_number("😊🙂"), "Unknown smiley digit: 🙂"),
+    ])
+
+    conversions = [("😂.", 3), ("", 0), ("😊" * 5000, int("1" * 4000) * 10 ** 1000 + int("1" * 1000))]
+    for smiley, expected in conversions:
+        assert calc.smiley_to_number(smiley) == expected, f"{smiley[:10]} ({len(smiley)} digits)"
+
+    encodings = [(-12, "➖😊😁"), (1.5e-07, "😊.😄➖😀😇"), (7.0, "😇")]
+    for number, expected in encodings:
+        result = calc.number_to_smiley(number)
+        assert result == expected, f"{number} -> {result} (expected {expected})"
+
+
+def test_alphabets():
+    """Test registered alphabets, other bases and codec sharing."""
+    from smiley_codec import get_codec, register_alphabet
+
+    print("🧪 Testing alphabets and bases...\n")
+
+    hex_calc = SmileyCalculator(alphabet="hex")
+    base60 = SmileyCalculator(alphabet="sexagesimal")
+    register_alphabet("binary", "🌑🌕")
+    binary = SmileyCalculator(alphabet="binary")
+    big = 7 ** 3000
+
+    assert hex_calc.codec is SmileyCalculator(alphabet="hex").codec is get_codec("hex"), "Codecs are shared"
+    assert hex_calc.operations is not SmileyCalculator().operations, "Operation tables are per instance"
+    assert hex_calc.calculate("😐😐", "➕", "😊") == "😊😀😀", "Base 16: ff + 1 = 100"
+    assert hex_calc.smiley_to_number("😊.😈") == 1.5 and hex_calc.number_to_smiley(-1.5) == "➖😊.😈", "Base 16 fractions"
+    assert base60.number_to_smiley(3661) == "😁😁😁" and base60.smiley_to_number("😁😁😁") == 3661, "Base 60"
+    assert base60.smiley_to_number(base60.number_to_smiley(big)) == big, "Base 60 big numbers"
+    assert binary.calculate("🌕🌑", "✖️", "🌕🌕") == "🌕🌕🌑", "Custom base 2 alphabet"
+    assert SmileyCalculator(alphabet="animals").evaluate("🐱🐶➕🐭") == "🐱🐭", "Expressions use the alphabet"
+
+    assert_raises_each([
+        (lambda: SmileyCalculator(alphabet="klingon"), "Unknown alphabet: klingon"),
+        (lambda: hex_calc.smiley_to_number("😊a"), "Unknown smiley digit: a"),
+        (lambda: register_alphabet("twins", "🌑🌑"), "Alphabet digits must be distinct"),
+    ])
+
+
+def test_tokenizer():
+    """Test incremental tokenizing of chunked byte and text streams."""
+    from tokenizer import Token, tokenize_chunks
+
+    print("🧪 Testing incremental tokenizer...\n")
+
+    calc = SmileyCalculator()
+    text = "😊😀✖️(😁.😂 ➖😃)\n😄✖➗😆"
+    data = text.encode("utf-8")
+    whole = list(tokenize_chunks([text], calc))
+    tokenizer = calc.tokenizer()
+    held = tokenizer.feed(data[:9]) + tokenizer.feed(data[9:11])
+
+    assert [token.kind for token in whole] == ["number", "operator", "(", "number", "decimal", "number", "operator", "number", ")", "newline", "number", "operator", "operator", "number"], "Token kinds"
+    assert whole[0] == Token("number", "😊😀", 0, 1, 1) and whole[10] == Token("number", "😄", 13, 2, 1), "Positions"
+    assert whole[1].text == whole[11].text == "✖️", "✖ with and without U+FE0F"
+    assert (all(
+            list(tokenize_chunks([data[:i], data[i:j], data[j:]], calc)) == whole
+            for i in range(len(data)) for j in range(i, len(data))
+        )), "Every split of the UTF-8 bytes"
+    assert list(tokenize_chunks(list(text), calc)) == whole, "One character per chunk"
+    assert held == [Token("number", "😊😀", 0, 1, 1)] and tokenizer.close() == [Token("operator", "✖️", 2, 1, 3)], "Held back until the stream ends"
+    assert [token.text for token in tokenize_chunks([b"\xf0\x9f\x90", b"\xb1\xf0\x9f\x90\xb6"], SmileyCalculator(alphabet="animals"))] == ["🐱🐶"], "Other alphabets"
+
+    assert_raises_each((lambda chunks=chunks: list(tokenize_chunks(chunks, calc)), expected) for chunks, expected in (
+        (["😊➕\n😁x"], "Unknown symbol 'x' at line 2, column 2"),
+        ([b"\xf0\x9f", "😊"], "Text chunk received in the middle of a UTF-8 sequence"),
+        ([b"\xf0\x9f"], "'utf-8' codec can't decode bytes in position 0-1: unexpected end of data"),
+    ))
+
+
+def test_big_numbers():
+    """Test exact conversions and arithmetic on huge smiley integers."""
+    calc = SmileyCalculator(big_numbers=True)
+
+    print("🧪 Testing big-number mode...\n")
+
+    digits = list(calc.numbers)
+    huge = "".join(digits[(i * 7 + 3) % 10] for i in range(20000))
+    number = calc.smiley_to_number(huge)
+
+    assert calc.number_to_smiley(number) == huge, "20 000-digit round trip"
+    assert calc.number_to_smiley(-number) == "➖" + huge, "Negative round trip"
+    assert calc.calculate(huge, "✖️", "😁") == calc.number_to_smiley(number * 2), "Exact multiplication"
+    assert calc.calculate(huge + huge, "➗", huge) == calc.number_to_smiley(10 ** 20000 + 1), "Exact division"
+    assert isinstance(calc.divide(number * 3, 3), int), "Division stays an int"
+    assert calc.calculate("😉", "➗", "😃") == "😁.😁😄", "Inexact division still gives a decimal"
+    assert "1" * 5000 in format_calculation(calc.calculate_detailed("😊" * 5000, "✖️", "😊")), "Display of 5000-digit values"
+
+
+def test_expressions():
+    """Test expression parsing, precedence and the compiled-program cache."""
+    calc = SmileyCalculator()
+
+    print("🧪 Testing expressions...\n")
+
+    cases = [
+        ("😊😀➕😁✖️(😂➖😊)", "😊😃", "10 + 2 × (3 - 1) = 14"),
+        ("😊😀➕😁✖(😂➖😊)", "😊😃", "✖ without variation selector"),
+        ("(😊😀➕😁)✖️😂", "😂😆", "(10 + 2) × 3 = 36"),
+        ("😉➖😂➖😁", "😃", "9 - 3 - 2 = 4"),
+        ("😈➗😁➗😁", "😁", "8 ÷ 2 ÷ 2 = 2"),
+        ("➖😁✖️😂", "➖😆", "-2 × 3 = -6"),
+        ("😂.😄 ✖️ 😁", "😇", "3.5 × 2 = 7"),
+    ]
+    for expression, expected, description in cases:
+        result = calc.evaluate(expression)
+        assert result == expected, f"{expression} = {result} (expected {expected}) - {description}"
+
+    error_cases = ["😊➗😀", "(😊", "😁✖️✖️😁", "😊🙂", ""]
+    assert_raises_each((lambda expression=expression: calc.evaluate(expression), None) for expression in error_cases)
+
+    program = calc.expressions.compile("😊😀➕😁✖️(😂➖😊)")
+    assert calc.expressions.compile("😊😀➕😁✖️(😂➖😊)") is program, "Compiled program is reused from the cache"
+
+
+def test_memoization():
+    """Test the memoization cache counters, eviction and invalidation."""
+    calc = SmileyCalculator(cache_size=2)
+
+    print("🧪 Testing memoization...\n")
+
+    first = calc.number_to_smiley(25)
+    second = calc.number_to_smiley(25)
+    calc.number_to_smiley(10)
+    calc.number_to_smiley(3.5)
+    stats = calc.cache_stats()
+
+    assert first == second == "😁😄", "Cached result matches"
+    assert stats["hits"] == 1 and stats["misses"] == 3, "Hits and misses are counted"
+    assert stats["evictions"] == 1 and stats["size"] == 2, "Least recently used entry is evicted"
+    assert ("encode", 25) not in calc.cache, "Oldest entry was the one evicted"
+    assert calc.cache.invalidate(("encode", 3.5)), "Single entry invalidation"
+    assert SmileyCalculator().cache_stats() is None, "Caching is off by default"
+
+    calc = SmileyCalculator(cache_size=16)
+    calc.calculate("😁", "➕", "😃")
+    hits = calc.cache_stats()["hits"]
+    assert calc.calculate("😁", "➕", "😃") == "😆" and calc.cache_stats()["hits"] == hits + 1, "Calculations are memoized"
+    calc.clear_cache()
+    assert calc.cache_stats()["size"] == 0, "Cache can be cleared"
+
+    with pytest.raises(ValueError):
+        calc.calculate("😊", "➗", "😀")
+    assert ("calculate", "😊", "➗", "😀") not in calc.cache, "Errors are not cached"
+
+
+def test_reductions():
+    """Test single-pass aggregate reductions."""
+    import math
+    import statistics
+
+    from reductions import Reducer
+
+    print("🧪 Testing streaming reductions...\n")
+
+    calc = SmileyCalculator()
+    floats = [0.1 * i for i in range(1, 1000)] + [1e16, 1.0, -1e16]
+    ints = [(-7) ** i for i in range(20)]
+    mixed = ints[:100] + [0.5] + ints[100:]
+    float_stats = Reducer().update(iter(floats)).results()
+    int_stats = Reducer().update(ints).results()
+    mixed_stats = Reducer(["variance"]).update(mixed).results()
+    huge = Reducer(["mean", "variance"]).update([10 ** 400 + 1, 0]).results()
+    huge_mixed = Reducer(["sum", "mean", "product", "min"]).update([10 ** 400, 1.5]).results()
+
+    assert calc.aggregate(["😊😀", "😁", "➖😂"]) == {
+        "sum": "😉", "product": "➖😆😀", "mean": "😂", "min": "➖😂", "max": "😊😀",
+        "variance": calc.number_to_smiley(statistics.pvariance([10, 2, -3])),
+    }, "All reductions of smiley numbers"
+    assert calc.reduce("sum", (calc.number_to_smiley(i) for i in range(100000))) == calc.number_to_smiley(4999950000), "Sum of a generator"
+    assert float_stats["sum"] == math.fsum(floats) and float_stats["mean"] == math.fsum(floats) / len(floats), "Compensated float sum"
+    assert math.isclose(float_stats["variance"], statistics.pvariance(floats)), "Welford variance"
+    assert int_stats["sum"] == sum(ints) and int_stats["product"] == math.prod(ints), "Exact int sum and product"
+    assert int_stats["variance"] == statistics.pvariance(ints) and int_stats["mean"] == statistics.mean(ints), "Exact int mean and variance"
+    assert math.isclose(mixed_stats["variance"], statistics.pvariance(mixed)), "Ints then floats"
+    assert huge == {"mean": 5 * 10 ** 399 + 1, "variance": 25 * 10 ** 798 + 5 * 10 ** 399}, "Huge ints round to the nearest int"
+    assert huge_mixed == {"sum": 10 ** 400 + 2, "mean": 5 * 10 ** 399 + 1, "product": 15 * 10 ** 399, "min": 1.5}, "Huge ints mixed with floats"
+    assert calc.aggregate([], ["sum", "product"]) == {"sum": "😀", "product": "😊"}, "Empty sum and product"
+
+    assert_raises_each([
+        (lambda: calc.reduce("mean", []), "Calculation error: Cannot compute the mean of no values"),
+        (lambda: calc.reduce("median", ["😊"]), "Calculation error: Unknown reduction: median"),
+        (lambda: calc.reduce("variance", ["😊" * 400, "😊.😊"]), "Calculation error: Variance is out of the float range"),
+    ])
+
+
+def test_smiley_array():
+    """Test vectorized decoding, arithmetic and encoding against the scalar calculator."""
+    calc = SmileyCalculator()
+    left = ["😁😄", "😊😀", "😉😉", "😀😂"]
+    right = ["😂", "😄", "😊😀", "😁"]
+
+    print("🧪 Testing SmileyArray...\n")
+
+    a = SmileyArray.from_smileys(left, calc)
+    b = SmileyArray.from_smileys(right, calc)
+    assert a.values.tolist() == [25, 10, 99, 3], "Fixed-width numbers are decoded"
+    for operation in calc.operations:
+        expected = [calc.calculate(x, operation, y) for x, y in zip(left, right)]
+        assert a.apply(operation, b).to_smileys() == expected, f"{operation} matches calculate()"
+
+    mixed = ["😊.😄", "😁😄", "😀.😀😊"]
+    assert SmileyArray.from_smileys(mixed, calc).values.tolist() == [1.5, 25.0, 0.01], "Decimals are decoded"
+    big = SmileyArray.from_smileys(["😉" * 12], calc) * ("😉" * 12)
+    assert big.values.tolist() == [(10 ** 12 - 1) ** 2], "Overflowing products stay exact"
+
+    wide = ["😉" * 17, "😈" * 17]
+    expected = [calc.calculate(x, "➗", "😇") for x in wide]
+    assert (SmileyArray.from_smileys(wide, calc) / "😇").to_smileys() == expected, "int64 division beyond 2 ** 53 rounds once"
+
+    # Columns of 17+ digit ints mixed with decimals must match the scalar calculator exactly
+    rng = random.Random(15)
+    digits = list(calc.numbers)
+
+    def operand():
+        whole = rng.choice(digits[1:]) + "".join(rng.choice(digits) for _ in range(rng.randint(16, 24)))
+        if rng.random() < 0.25:
+            return rng.choice(digits[1:]) + "." + "".join(rng.choice(digits) for _ in range(rng.randint(1, 3)))
+        return whole
+
+    for _ in range(25):
+        left_column = [operand() for _ in range(8)]
+        right_column = [operand() for _ in range(8)]
+        a = SmileyArray.from_smileys(left_column, calc)
+        b = SmileyArray.from_smileys(right_column, calc)
+        for operation in calc.operations:
+            expected = [calc.calculate(x, operation, y) for x, y in zip(left_column, right_column)]
+            assert a.apply(operation, b).to_smileys() == expected, f"{operation} of big and decimal columns matches calculate()"
+
+    zeros = SmileyArray.from_smileys(["😀"] * len(right), calc)
+    assert_raises_each([
+        (lambda: SmileyArray.from_smileys(["😊", "😊5"], calc), None),
+        (lambda: SmileyArray.from_smileys(right, calc).apply("➗", zeros), None),
+    ])
+
+
+def test_batch_mode():
+    """Test that batch mode streams one output line per input line in order."""
+    calc = SmileyCalculator()
+
+    print("🧪 Testing batch mode...\n")
+
+    source = "😁➕😃\n\n😊😀➕😁✖️(😂➖😊)\n😊➗😀\n😁 ✖️ 😄\n"
+    expected = ["😆", "", "😊😃", "❌ Calculation error: Cannot divide by zero! 🚫", "😊😀"]
+
+    for jobs in (1, 2):
+        output = io.StringIO()
+        batch_mode(calc, io.StringIO(source), output, jobs=jobs)
+        lines = output.getvalue().splitlines()
+        assert lines == expected, f"jobs={jobs}: {lines}"
+
+
+def test_evaluate_file():
+    """Test chunk-parallel file evaluation keeps one result per line in order."""
+    print("🧪 Testing file evaluation...\n")
+
+    lines = ["😁➕😃", "😊😀➕😁✖️(😂➖😊)", "😊➗😀", "", "😁 ✖️ 😄"] * 50
+    calc = SmileyCalculator()
+    expected = [evaluate_line(calc, line) for line in lines]
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "input.txt")
+        output_path = os.path.join(directory, "output.txt")
+        with open(input_path, "w", encoding="utf-8") as handle:
+            handle.write("\n".join(lines))
+
+        count, _ = evaluate_file(input_path, output_path, jobs=2, chunk_bytes=100)
+        with open(output_path, encoding="utf-8") as handle:
+            results = handle.read().split("\n")[:-1]
+
+    assert count == len(lines) and results == expected, f"{count} lines evaluated in order"
+
+
+def test_profile_run():
+    """Test the profiler used by the --profile and --trace-memory flags."""
+    import pstats
+
+    from profiling import profile_run
+
+    calc = SmileyCalculator()
+
+    print("🧪 Testing CLI profiling...\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        stats_path = os.path.join(directory, "run.pstats")
+        stacks_path = os.path.join(directory, "run.collapsed")
+        memory_path = os.path.join(directory, "memory.txt")
+
+        with profile_run(stats_path, memory_path):
+            kept = [calc.calculate("😉" * 50, "✖️", "😉" * 50) for _ in range(200)]
+        with profile_run(stacks_path):
+            for _ in range(2000):
+                calc.calculate("😉" * 500, "✖️", "😉" * 500)
+
+        stats = pstats.Stats(stats_path)
+        with open(stacks_path, encoding="utf-8") as handle:
+            stacks = handle.read()
+        with open(memory_path, encoding="utf-8") as handle:
+            memory = handle.read()
+
+    assert any(function[2] == "_calculate" for function in stats.stats), "cProfile statistics are written"
+    assert "calculate (calculator.py" in stacks and stacks.split("\n")[0].rsplit(" ", 1)[1].isdigit(), "Collapsed stacks are written"
+    assert len(kept) == 200 and "test_calculator.py" in memory, "Allocation sites are written"
+
+
+def test_one_shot_cold_start():
+    """Test `calculator.py -e` and track its cold-start time."""
+    print("🧪 Testing one-shot evaluation...\n")
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "calculator.py")
+
+    def best_time(command):
+        """Best wall time of a few runs of a command, in seconds."""
+        timings = []
+        for _ in range(5):
+            started = time.perf_counter()
+            subprocess.run(command, capture_output=True, check=True)
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    # -S keeps site-packages hooks from importing modules on the calculator's behalf
+    traced = subprocess.run([sys.executable, "-S", "-X", "importtime", script, "-e", "😊😀➕😄"], capture_output=True)
+    imported = {line.rsplit("|", 1)[1].strip() for line in traced.stderr.decode().splitlines() if line.startswith("import time:")}
+    failed = subprocess.run([sys.executable, script, "--eval", "😊➗😀"], capture_output=True)
+    interpreter = best_time([sys.executable, "-S", "-c", "pass"])
+    one_shot = best_time([sys.executable, "-S", script, "-e", "😊😀✖️(😁➕😂)"])
+    cached = best_time([sys.executable, "-S", "-m", "calculator", "-e", "😊😀✖️(😁➕😂)"])
+
+    assert traced.returncode == 0 and traced.stdout.decode("utf-8") == "😊😄\n", "Prints the result"
+    assert failed.returncode == 1 and failed.stderr.decode("utf-8") == "❌ Calculation error: Cannot divide by zero! 🚫\n", "Errors go to stderr with status 1"
+    assert not imported & {"argparse", "random", "decimal", "tokenizer", "numpy"}, f"Deferred imports stay unloaded ({len(imported)} modules)"
+    assert one_shot - interpreter < COLD_START_BUDGET, f"Cold start {one_shot * 1000:.0f}ms (python -m: {cached * 1000:.0f}ms, bare interpreter: {interpreter * 1000:.0f}ms)"
+
+
 if __name__ == "__main__":
     test_calculator()
+    test_calculate_batch()
+    test_calculate_detailed()
+    test_codec_validation()
+    test_alphabets()
+    test_tokenizer()
+    test_big_numbers()
+    test_expressions()
+    test_memoization()
+    test_reductions()
+    test_smiley_array()
+    test_batch_mode()
+    test_evaluate_file()
+    test_profile_run()
+    test_one_shot_cold_start()
+
@@ -2,11 +2,248 @@
 """
 test_web.py
 Test script for the web version of the Smiley Calculator
+
+Also a load generator: with --load it drives /calculate, /api/convert and /
+from a pool of threads for a fixed time and prints throughput and latency
+percentiles as JSON. It targets a running server (--url), a server started in
+this process (--serve) or the Flask test client (--local).
+
+Usage:
+    python test_web.py                      # run the tests against http://127.0.0.1:5000
+    python test_web.py --load --local --concurrency 8 --duration 10
+    python test_web.py --load --url http://127.0.0.1:8000 --mix calculate=8,convert=1,index=1
 """
 
 import requests
+import io
 import json
 import sys
+import argparse
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Default share of each request kind in the load mix
+DEFAULT_MIX = {"calculate": 8, "convert": 1, "index": 1}
+
+# Latency percentiles reported by the load generator
+PERCENTILES = (50, 90, 99, 99.9)
+
+Sender = Callable[[str, str, Optional[dict]], int]
+
+
+def smiley_operand(rng: random.Random, digits: int) -> str:
+    """Build a random smiley number with the given number of digits."""
+    smileys = "😀😊😁😂😃😄😆😇😈😉"
+    return rng.choice(smileys[1:]) + "".join(rng.choice(smileys) for _ in range(digits - 1))
+
+
+def make_request(kind: str, rng: random.Random, digits: int) -> Tuple[str, str, Optional[dict]]:
+    """Return (method, path, JSON body) for one request of a kind in the mix."""
+    if kind == "calculate":
+        body = {"num1": smiley_operand(rng, digits), "operation": rng.choice(["➕", "➖", "✖️", "➗"]), "num2": smiley_operand(rng, digits)}
+        return "POST", "/calculate", body
+    if kind == "convert":
+        if rng.random() < 0.5:
+            return "POST", "/api/convert", {"smiley": smiley_operand(rng, digits)}
+        return "POST", "/api/convert", {"number": rng.randrange(10 ** digits)}
+    if kind == "index":
+        return "GET", "/", None
+    raise ValueError(f"Unknown request kind: {kind}")
+
+
+def http_sender(base_url: str) -> Callable[[], Sender]:
+    """Return a factory of senders that each reuse one HTTP connection pool."""
+
+    def factory() -> Sender:
+        session = requests.Session()
+
+        def send(method: str, path: str, body: Optional[dict]) -> int:
+            response = session.request(method, base_url + path, json=body, timeout=30)
+            response.content
+            return response.status_code
+
+        return send
+
+    return factory
+
+
+def local_sender() -> Callable[[], Sender]:
+    """Return a factory of senders that call the app through the Flask test client."""
+    from app import app
+
+    def factory() -> Sender:
+        client = app.test_client()
+
+        def send(method: str, path: str, body: Optional[dict]) -> int:
+            return client.open(path, method=method, json=body).status_code
+
+        return send
+
+    return factory
+
+
+@contextmanager
+def in_process_server():
+    """Serve the app from a thread of this process and yield its base URL."""
+    from werkzeug.serving import make_server
+    from app import app
+    from start_web import QuietRequestHandler
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(latencies: List[float], errors: int) -> dict:
+    """Count, errors and latency statistics in milliseconds."""
+    ordered = sorted(latencies)
+    summary = {"requests": len(ordered), "errors": errors}
+    for percent in PERCENTILES:
+        summary[f"p{percent:g}".replace(".", "")] = round(percentile(ordered, percent) * 1000, 3)
+    summary["max"] = round(ordered[-1] * 1000, 3) if ordered else 0.0
+    summary["mean"] = round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0
+    return summary
+
+
+def run_load(
+    sender_factory: Callable[[], Sender],
+    concurrency: int = 8,
+    duration: float = 10.0,
+    mix: Optional[Dict[str, int]] = None,
+    digits: int = 6,
+    seed: int = 1,
+    warmup: float = 0.0,
+) -> dict:
+    """Send requests from concurrency threads for duration seconds and return a report.
+
+    Each thread has its own sender (connection) and a random generator seeded
+    from seed, so the request sequence is repeatable. Requests finished during
+    the warmup are not counted. Any status other than 200 or 304 is an error.
+    """
+    mix = mix or DEFAULT_MIX
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    results: Dict[str, Tuple[List[float], List[int]]] = {kind: ([], []) for kind in kinds}
+    statuses: Dict[str, int] = {}
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(concurrency + 1)
+    timing = {}
+
+    def worker(index: int):
+        rng = random.Random(seed * 1000003 + index)
+        send = sender_factory()
+        latencies = {kind: [] for kind in kinds}
+        errors = {kind: 0 for kind in kinds}
+        codes: Dict[str, int] = {}
+        start_barrier.wait()
+        measure_from, stop_at = timing["measure_from"], timing["stop_at"]
+        while True:
+            kind = rng.choices(kinds, weights)[0]
+            method, path, body = make_request(kind, rng, digits)
+            started = time.perf_counter()
+            if started >= stop_at:
+                break
+            try:
+                status = str(send(method, path, body))
+            except Exception as e:
+                status = type(e).__name__
+            finished = time.perf_counter()
+            if started < measure_from:
+                continue
+            latencies[kind].append(finished - started)
+            codes[status] = codes.get(status, 0) + 1
+            if status not in ("200", "304"):
+                errors[kind] += 1
+        with lock:
+            for kind in kinds:
+                results[kind][0].extend(latencies[kind])
+                results[kind][1].append(errors[kind])
+            for status, count in codes.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    now = time.perf_counter()
+    timing["measure_from"] = now + warmup
+    timing["stop_at"] = now + warmup + duration
+    start_barrier.wait()
+    for thread in threads:
+        thread.join()
+    elapsed = max(time.perf_counter(), timing["stop_at"]) - timing["measure_from"]
+
+    all_latencies = [latency for latencies, _ in results.values() for latency in latencies]
+    total = summarize(all_latencies, sum(sum(errors) for _, errors in results.values()))
+    return {
+        "concurrency": concurrency,
+        "duration": duration,
+        "digits": digits,
+        "seed": seed,
+        "mix": mix,
+        "throughput_rps": round(total["requests"] / elapsed, 1),
+        "statuses": statuses,
+        "latency_ms": total,
+        "routes": {kind: summarize(latencies, sum(errors)) for kind, (latencies, errors) in results.items()},
+    }
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    """Parse 'calculate=8,convert=1,index=1' into weights."""
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        mix[kind.strip()] = int(weight or 1)
+    return mix
+
+
+def load_main(argv: Optional[List[str]] = None) -> dict:
+    """Command-line entry point of the load generator; prints and returns the JSON report."""
+    parser = argparse.ArgumentParser(description="🏋️ Smiley Calculator load generator")
+    parser.add_argument("--load", action="store_true", help="run the load generator instead of the tests")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="http://127.0.0.1:5000", help="base URL of a running server")
+    target.add_argument("--local", action="store_true", help="call the app through the Flask test client")
+    target.add_argument("--serve", action="store_true", help="start a threaded server in this process and load it over HTTP")
+    parser.add_argument("--concurrency", type=int, default=8, help="number of client threads (default: 8)")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds (default: 10)")
+    parser.add_argument("--warmup", type=float, default=1.0, help="unmeasured seconds before the run (default: 1)")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="request weights, e.g. calculate=8,convert=1,index=1")
+    parser.add_argument("--digits", type=int, default=6, help="smiley digits per operand (default: 6)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for repeatable request sequences")
+    parser.add_argument("--output", metavar="FILE", help="also write the JSON report to FILE")
+    args = parser.parse_args(argv)
+
+    options = dict(concurrency=args.concurrency, duration=args.duration, mix=args.mix, digits=args.digits, seed=args.seed, warmup=args.warmup)
+    if args.local:
+        report = dict(target="local", **run_load(local_sender(), **options))
+    elif args.serve:
+        with in_process_server() as url:
+            report = dict(target=url, **run_load(http_sender(url), **options))
+    else:
+        report = dict(target=args.url, **run_load(http_sender(args.url), **options))
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    return report
 
 
 def test_web_calculator():
@@ -78,6 +315,576 @@ def test_web_calculator():
     return True
 
 
+def test_batch_endpoint():
+    """Test the batch calculation endpoint through the Flask test client."""
+    from app import app
+
+    client = app.test_client()
+
+    print("🧪 Testing batch calculation endpoint...\n")
+
+    response = client.post(
+        "/api/calculate/batch",
+        json={
+            "calculations": [
+                {"num1": "😁", "operation": "➕", "num2": "😃"},
+                {"num1": "😊", "operation": "➗", "num2": "😀"},
+                {"num1": "😊", "operation": "➕"},
+            ]
+        },
+    )
+    data = response.get_json()
+    results = data["results"]
+
+    assert results[0] == {"success": True, "result": "😆"}, "2 + 4 = 6"
+    assert not results[1]["success"] and "divide by zero" in results[1]["error"], "Division by zero"
+    assert not results[2]["success"], "Missing operand"
+
+
+def test_evaluate_endpoint():
+    """Test the expression endpoint through the Flask test client."""
+    from app import app
+
+    client = app.test_client()
+
+    print("🧪 Testing expression endpoint...\n")
+
+    data = client.post("/api/evaluate", json={"expression": "😊😀➕😁✖️(😂➖😊)"}).get_json()
+    assert data["success"] and data["result"] == "😊😃" and data["result_regular"] == 14, f"10 + 2 × (3 - 1) = {data.get('result')}"
+
+    data = client.post("/api/evaluate", json={"expression": "😊➗😀"}).get_json()
+    assert not data["success"] and "divide by zero" in data["error"], f"Division by zero: {data.get('error')}"
+
+
+def test_big_number_responses():
+    """Test that results beyond the 4300-digit int-to-str limit come back as digit strings."""
+    import os
+    import tempfile
+
+    import app as web
+    from calculator import SmileyCalculator
+    from history import HistoryStore
+
+    client = web.app.test_client()
+    calc = SmileyCalculator()
+    operand = "😉" * 2500
+    product = "9" * 2499 + "8" + "0" * 2499 + "1"
+
+    print("🧪 Testing big-number responses...\n")
+
+    data = client.post("/calculate", json={"num1": operand, "operation": "✖️", "num2": operand}).get_json()
+    assert data["success"] and calc.smiley_to_number(data["result"]) == (10 ** 2500 - 1) ** 2, "/calculate multiplies 2500-digit numbers"
+    assert data["calculation"]["result_regular"] == product, "/calculate sends the product as digits"
+    assert data["calculation"]["num1_regular"] == "9" * 2500, "/calculate sends big operands as digits"
+
+    data = client.post("/api/evaluate", json={"expression": operand + "✖️" + operand}).get_json()
+    assert data["success"] and data["result_regular"] == product, "/api/evaluate sends the product as digits"
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = HistoryStore(os.path.join(directory, "history.db"), flush_interval=0.05)
+        previous, web.history = web.history, store
+        try:
+            data = client.post("/api/convert", json={"smiley": "😊" * 5000}).get_json()
+            store.close()
+            items, _ = store.query()
+        finally:
+            web.history = previous
+    assert data["success"] and data["number"] == "1" * 5000, "/api/convert sends 5000-digit numbers as digits"
+    assert items[0]["success"] and items[0]["result"] == "1" * 5000, "History stores 5000-digit numbers"
+
+    data = client.post("/api/convert", json={"smiley": "😊😀"}).get_json()
+    assert data["number"] == 10, "Small numbers stay JSON numbers"
+
+
+def test_cache_endpoint():
+    """Test that only an authorized DELETE clears the memoization caches."""
+    import app as web
+
+    client = web.app.test_client()
+
+    print("🧪 Testing cache endpoint...\n")
+
+    client.post("/calculate", json={"num1": "😁", "operation": "➕", "num2": "😃"})
+    client.post("/calculate", json={"num1": "😁", "operation": "➕", "num2": "😃", "alphabet": "hex"})
+    disabled = client.delete("/api/cache")
+    previous, web.CACHE_TOKEN = web.CACHE_TOKEN, "s3cret"
+    try:
+        unauthorized = client.delete("/api/cache", headers={"Authorization": "Bearer wrong"})
+        cleared = client.delete("/api/cache", headers={"Authorization": "Bearer s3cret"})
+    finally:
+        web.CACHE_TOKEN = previous
+
+    assert client.get("/api/cache").get_json()["success"], "Counters are readable"
+    assert disabled.status_code == 403, "DELETE is off without a token"
+    assert unauthorized.status_code == 401 and unauthorized.headers["WWW-Authenticate"] == "Bearer", "DELETE needs the token"
+    assert cleared.status_code == 200 and cleared.get_json()["cache"]["size"] == 0, "Authorized DELETE clears the cache"
+    assert web.calculator_for("hex").cache_stats()["size"] == 0, "Every alphabet's cache is cleared"
+
+
+def test_alphabet_parameter():
+    """Test that /calculate and /api/convert accept an alphabet name."""
+    from app import app
+
+    client = app.test_client()
+
+    print("🧪 Testing alphabet parameter...\n")
+
+    data = client.post("/calculate", json={"num1": "😐😐", "operation": "➕", "num2": "😊", "alphabet": "hex"}).get_json()
+    assert data["success"] and data["result"] == "😊😀😀" and data["calculation"]["result_regular"] == 256, f"Base 16 calculation: {data.get('result')}"
+
+    data = client.post("/api/convert", json={"number": 3661, "alphabet": "sexagesimal"}).get_json()
+    assert data["success"] and data["smiley"] == "😁😁😁", f"Base 60 conversion: {data.get('smiley')}"
+
+    data = client.post("/api/convert", json={"smiley": "😊", "alphabet": "klingon"}).get_json()
+    assert not data["success"] and data["error"] == "Unknown alphabet: klingon", f"Unknown alphabet: {data.get('error')}"
+
+    alphabets = client.get("/api/alphabets").get_json()["alphabets"]
+    assert alphabets["hex"]["base"] == 16 and alphabets["faces"]["digits"] == "😀😊😁😂😃😄😆😇😈😉", "Alphabets are listed"
+
+
+def test_stream_endpoint():
+    """Test the streaming NDJSON endpoint through the Flask test client."""
+    from app import app
+
+    client = app.test_client()
+
+    print("🧪 Testing streaming endpoint...\n")
+
+    lines = [
+        json.dumps({"num1": "😁", "operation": "➕", "num2": "😃"}),
+        "",
+        "not json",
+        json.dumps({"expression": "😊😀➕😁✖️(😂➖😊)"}),
+        json.dumps({"num1": "😊", "operation": "➗", "num2": "😀"}),
+    ]
+    response = client.post("/api/calculate/stream", data="\n".join(lines), content_type="application/x-ndjson")
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert response.mimetype == "application/x-ndjson", "NDJSON response"
+    assert records[0] == {"line": 1, "success": True, "result": "😆"}, "Binary calculation"
+    assert records[1]["line"] == 3 and not records[1]["success"], "Bad line gets an error record"
+    assert records[2]["result"] == "😊😃", "Expression line"
+    assert not records[3]["success"] and "divide by zero" in records[3]["error"], "Division by zero"
+    assert len(records) == 4, "Blank lines are skipped"
+
+
+def test_reduce_endpoint():
+    """Test single-pass reductions over a streamed body through the Flask test client."""
+    from app import app
+
+    client = app.test_client()
+
+    print("🧪 Testing reduce endpoint...\n")
+
+    body = "😊😀\n😁\n\n➖😂\n".encode("utf-8")
+    everything = client.post("/api/reduce", data=body, content_type="text/plain").get_json()
+    streamed = client.post("/api/reduce?operations=sum,max", input_stream=io.BytesIO("😊\n".encode("utf-8") * 100000), content_type="text/plain").get_json()
+    hexadecimal = client.post("/api/reduce?alphabet=hex&operations=sum", data="😐\n😊\n".encode("utf-8")).get_json()
+    bad_line = client.post("/api/reduce", data="😊\n😁x\n".encode("utf-8")).get_json()
+    empty = client.post("/api/reduce?operations=mean", data=b"").get_json()
+    big_and_float = client.post("/api/reduce?operations=sum", data=("😊" * 400 + "\n😊.😊\n").encode("utf-8")).get_json()
+
+    assert everything["success"] and everything["count"] == 3, "Blank lines are skipped"
+    assert everything["results"]["sum"] == "😉" and everything["results"]["product"] == "➖😆😀", "Sum and product"
+    assert everything["results"]["min"] == "➖😂" and everything["results"]["mean"] == "😂", "Negative values, min and mean"
+    assert streamed["results"] == {"sum": "😊😀😀😀😀😀", "max": "😊"} and streamed["count"] == 100000, "Long streamed body"
+    assert hexadecimal["results"] == {"sum": "😊😀"}, "Alphabet parameter"
+    assert not bad_line["success"] and bad_line["error"] == "Calculation error: Unknown smiley digit: x (line 2)", "Errors name the line"
+    assert not empty["success"] and "no values" in empty["error"], "Mean of nothing"
+    assert big_and_float["success"] and big_and_float["results"]["sum"] == "😊" * 399 + "😁", "Big ints stay exact next to floats"
+
+
+def test_channel():
+    """Test the persistent SSE channel and its correlated results through the Flask test client."""
+    from app import app, channels
+    from channel import Channel
+
+    client = app.test_client()
+
+    print("🧪 Testing persistent channel...\n")
+
+    def parse(chunk):
+        """Return (event name, data) of one Server-Sent Event."""
+        fields = dict(line.split(": ", 1) for line in chunk.decode("utf-8").strip().splitlines())
+        return fields.get("event", "message"), json.loads(fields["data"])
+
+    stream = client.get("/channel", buffered=False)
+    events = iter(stream.response)
+    event, ready = parse(next(events))
+    registered = ready["channel"] in channels.channels
+    messages = [
+        {"id": "1", "type": "calculate", "num1": "😊😀", "operation": "➕", "num2": "😄"},
+        {"id": "2", "type": "preview", "num1": "😊", "operation": "✖️"},
+        {"id": "3", "type": "preview", "num1": "😊", "operation": "✖️", "num2": "😁"},
+        {"id": "4", "type": "convert", "number": 42},
+        {"id": "5", "type": "divide"},
+        {"id": "7", "type": "calculate", "num1": "😊", "operation": ["x"], "num2": "😊"},
+        {"id": "8", "type": "preview", "num1": "😊", "operation": "?"},
+    ]
+    posted = client.post(f"/channel/{ready['channel']}", json=messages)
+    results = {result["id"]: result for result in (parse(next(events))[1] for _ in messages)}
+    elsewhere = client.post("/channel/not-open-here", json=[messages[5], {"id": "6", "type": "convert", "smiley": "😂😁"}])
+    too_many = client.post(f"/channel/{ready['channel']}", json=[{"type": "convert", "number": 1}] * 101)
+    open_before = len(channels)
+    stream.close()
+
+    quiet = Channel("quiet")
+    timed_out = [parse(chunk.encode("utf-8"))[0] if chunk.startswith("retry") else chunk for chunk in quiet.stream(heartbeat=0.05, max_seconds=0.125)]
+
+    assert stream.mimetype == "text/event-stream" and event == "ready" and registered, "Stream starts with a ready event"
+    assert posted.status_code == 202 and posted.data == b"", "Posts are answered with an empty 202"
+    assert results["1"]["success"] and results["1"]["result"] == "😊😄" and results["1"]["calculation"]["result_regular"] == 15, "Calculation result"
+    assert results["2"]["calculation"] == {"num1_regular": 1, "operation_name": "multiply"}, "Preview of partial input"
+    assert results["3"]["calculation"]["result"] == "😁", "Preview of complete input"
+    assert results["4"]["smiley"] == "😃😁", "Conversion result"
+    assert results["5"] == {"id": "5", "type": "divide", "success": False, "error": "Unknown message type: divide"}, "Unknown message type"
+    assert not results["7"]["success"] and results["7"]["error"] == "Calculation error: Unknown operation: ['x']", "Malformed operation"
+    assert results["8"] == {"id": "8", "type": "preview", "success": False, "error": "Unknown operation: ?"}, "Preview of an unknown operation"
+    assert elsewhere.status_code == 200 and elsewhere.get_json()["results"][1]["number"] == 32, "Other processes answer in the body"
+    assert too_many.status_code == 400, "Batches are bounded"
+    assert ready["channel"] not in channels.channels and len(channels) == open_before - 1, "Closing the stream closes the channel"
+    assert timed_out == ["ready", ": heartbeat\n\n", ": heartbeat\n\n"], "Heartbeats, then the stream ends for a reconnect"
+
+
+def call_asgi(application, method, path, body=b""):
+    """Send one request to an ASGI application and return (status, body)."""
+    import asyncio
+
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "headers": []}
+    asyncio.run(application(scope, receive, send))
+    return messages[0]["status"], b"".join(message.get("body", b"") for message in messages[1:])
+
+
+def test_asgi_matches_flask():
+    """Test that the ASGI app returns the same responses as the Flask app."""
+    from app import app
+    from asgi_app import application
+
+    client = app.test_client()
+
+    print("🧪 Testing ASGI app against the Flask app...\n")
+
+    requests_to_compare = [
+        ("/calculate", {"num1": "😁", "operation": "➕", "num2": "😃"}),
+        ("/calculate", {"num1": "😊", "operation": "➗", "num2": "😀"}),
+        ("/calculate", {"num1": "😉" * 3000, "operation": "✖️", "num2": "😁"}),
+        ("/api/convert", {"smiley": "😊😀"}),
+        ("/api/convert", {"number": 25}),
+    ]
+    for path, data in requests_to_compare:
+        status, body = call_asgi(application, "POST", path, json.dumps(data).encode("utf-8"))
+        expected = client.post(path, json=data).get_data()
+        assert status == 200 and body == expected, f"POST {path}"
+
+    for path in ("/", "/help"):
+        status, body = call_asgi(application, "GET", path)
+        assert status == 200 and body == client.get(path).get_data(), f"GET {path}"
+
+    status, _ = call_asgi(application, "GET", "/missing")
+    assert status == 404, "Unknown route returns 404"
+
+
+def test_metrics_endpoint():
+    """Test that SMILEY_METRICS=1 exposes Prometheus metrics at /metrics."""
+    import os
+    import subprocess
+
+    print("🧪 Testing metrics endpoint...\n")
+
+    script = (
+        "from app import app\n"
+        "client = app.test_client()\n"
+        "client.post('/calculate', json={'num1': '😁', 'operation': '➕', 'num2': '😃'})\n"
+        "client.post('/calculate', json={'num1': '😊', 'operation': '➗', 'num2': '😀'})\n"
+        "print(client.get('/metrics').get_data(as_text=True))\n"
+    )
+    environment = dict(os.environ, SMILEY_METRICS="1", PYTHONIOENCODING="utf-8")
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, encoding="utf-8", env=environment).stdout
+
+    assert 'smiley_requests_total{method="POST",route="/calculate",status="200"} 2' in output, "Requests are counted"
+    assert 'smiley_errors_total{exception="ValueError",route="/calculate"} 1' in output, "Errors are counted by type"
+    assert 'smiley_request_duration_seconds_count{route="/calculate"} 2' in output, "Route latency histogram"
+    assert 'smiley_calculator_stage_seconds_count{stage="compute"}' in output, "Calculator stage timings"
+
+    from app import app
+
+    status = app.test_client().get("/metrics").status_code
+    assert status == 404, "/metrics is not installed when disabled"
+
+
+def test_prerendered_pages():
+    """Test compressed variants, ETags and 304 handling of the HTML pages."""
+    import gzip
+
+    from app import app
+
+    client = app.test_client()
+
+    print("🧪 Testing pre-rendered pages...\n")
+
+    for path in ("/", "/help"):
+        plain = client.get(path)
+        compressed = client.get(path, headers={"Accept-Encoding": "gzip"})
+        cached = client.get(path, headers={"If-None-Match": plain.headers["ETag"]})
+        assert plain.status_code == 200 and "Content-Encoding" not in plain.headers, f"{path}: Identity body"
+        assert plain.headers["ETag"].startswith('"') and "max-age" in plain.headers["Cache-Control"], f"{path}: Strong ETag and cache headers"
+        assert compressed.headers.get("Content-Encoding") == "gzip", f"{path}: gzip variant"
+        assert gzip.decompress(compressed.get_data()) == plain.get_data(), f"{path}: gzip variant matches"
+        assert cached.status_code == 304 and not cached.get_data(), f"{path}: 304 for a current ETag"
+        assert client.get(path, headers={"If-None-Match": '"stale"'}).status_code == 200, f"{path}: 200 for a stale ETag"
+        other_variant = client.get(path, headers={"Accept-Encoding": "gzip", "If-None-Match": plain.headers["ETag"]})
+        assert other_variant.status_code == 200 and other_variant.headers["Content-Encoding"] == "gzip", f"{path}: 200 for another variant's ETag"
+        weak = client.get(path, headers={"If-None-Match": "W/" + plain.headers["ETag"]})
+        assert weak.status_code == 304, f"{path}: weak comparison"
+
+
+def test_history():
+    """Test batched history writes and keyset-paginated queries."""
+    import os
+    import tempfile
+
+    import app as web
+    from history import HistoryStore
+
+    print("🧪 Testing calculation history...\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = HistoryStore(os.path.join(directory, "history.db"), flush_interval=0.05)
+        previous, web.history = web.history, store
+        try:
+            client = web.app.test_client()
+            for _ in range(3):
+                client.post("/calculate", json={"num1": "😁", "operation": "➕", "num2": "😃"})
+            client.post("/calculate", json={"num1": "😊", "operation": "➗", "num2": "😀"})
+            client.post("/api/convert", json={"smiley": "😊😀"})
+            store.close()
+            client.post("/calculate", json={"num1": "😁", "operation": "➕", "num2": "😃"})
+            late_writer = any(thread.name == "history-writer" for thread in threading.enumerate())
+
+            first = client.get("/api/history?limit=2").get_json()
+            second = client.get(f"/api/history?limit=2&cursor={first['next_cursor']}").get_json()
+            third = client.get(f"/api/history?limit=2&cursor={second['next_cursor']}").get_json()
+            added = client.get("/api/history?operation=add").get_json()
+            divided = client.get("/api/history?operation=divide").get_json()["items"]
+            future = client.get("/api/history?start=9999999999").get_json()
+        finally:
+            web.history = previous
+
+    pages = first["items"] + second["items"] + third["items"]
+    assert len(pages) == 5 and third["next_cursor"] is None, "Three pages cover all five records"
+    assert len({item["id"] for item in pages}) == 5, "Pages do not overlap"
+    assert len(added["items"]) == 3 and all(item["result"] == "😆" for item in added["items"]), "Filter by operation"
+    assert len(divided) == 1 and not divided[0]["success"] and "divide by zero" in divided[0]["error"], "Errors are recorded"
+    assert pages[-1]["operation"] == "convert" and pages[-1]["result"] == "10", "Conversions are recorded"
+    assert future["items"] == [], "Filter by time range"
+    assert store.dropped == 1 and not late_writer, "Records after close are dropped without a writer thread"
+
+    # A malformed operation is recorded under a readable name and keeps its own error
+    with tempfile.TemporaryDirectory() as directory:
+        store = HistoryStore(os.path.join(directory, "history.db"), flush_interval=0.05)
+        previous, web.history = web.history, store
+        try:
+            bad = web.app.test_client().post("/calculate", json={"num1": "😊", "operation": ["x"], "num2": "😊"}).get_json()
+            store.close()
+            items, _ = store.query()
+        finally:
+            web.history = previous
+    assert not bad["success"] and bad["error"].startswith("Calculation error"), "Bad operations keep the calculation error"
+    assert items[0]["operation"] == "['x']" and items[0]["error"] == bad["error"], "Bad operations are recorded"
+
+
+def test_production_server():
+    """Test the multi-process launcher: serving, crash restarts, reloads without errors and shutdown."""
+    import os
+    import signal
+    import socket
+    import subprocess
+    import threading
+    import time
+
+    print("🧪 Testing production server...\n")
+
+    if not hasattr(os, "fork"):
+        print("  ⏭️ Skipped: production mode needs os.fork")
+        return
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    url = f"http://127.0.0.1:{port}/calculate"
+    body = {"num1": "😁", "operation": "➕", "num2": "😃"}
+
+    command = [sys.executable, "start_web.py", "--production", "--workers", "2", "--bind", f"127.0.0.1:{port}", "--graceful-timeout", "5"]
+    environment = dict(os.environ, PYTHONIOENCODING="utf-8")
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True, encoding="utf-8", env=environment, cwd=os.path.dirname(os.path.abspath(__file__)))
+    lines = []
+    threading.Thread(target=lambda: lines.extend(line.rstrip() for line in server.stdout), daemon=True).start()
+
+    try:
+        for _ in range(100):
+            try:
+                requests.post(url, json=body, timeout=5)
+                break
+            except requests.exceptions.RequestException:
+                time.sleep(0.1)
+
+        pids = [int(line.split()[2]) for line in lines if line.startswith("👷 Worker")]
+        os.kill(pids[0], signal.SIGKILL)
+        time.sleep(1.5)
+        restarted = len([line for line in lines if line.startswith("👷 Worker")]) == 3
+
+        # Keep requests flowing while every worker is replaced
+        results = []
+        done = threading.Event()
+
+        def send_requests():
+            while not done.is_set():
+                try:
+                    results.append(requests.post(url, json=body, timeout=5).json()["result"] == "😆")
+                except requests.exceptions.RequestException:
+                    results.append(False)
+
+        clients = [threading.Thread(target=send_requests) for _ in range(2)]
+        for client in clients:
+            client.start()
+        time.sleep(0.5)
+        server.send_signal(signal.SIGHUP)
+        time.sleep(2)
+        done.set()
+        for client in clients:
+            client.join()
+
+        server.send_signal(signal.SIGTERM)
+        status = server.wait(timeout=30)
+    finally:
+        if server.poll() is None:
+            server.kill()
+
+    assert restarted, "Crashed worker is restarted"
+    assert results and all(results), f"{len(results)} requests during a reload all succeeded"
+    assert status == 0, "Graceful shutdown"
+
+
+def test_admission_control():
+    """Test cost-weighted admission, queue limits and load shedding on /calculate."""
+    import threading
+    import time
+    import app as web
+    from admission import AdmissionController, Overloaded
+
+    print("🧪 Testing admission control...\n")
+
+    controller = AdmissionController(capacity=4, max_queue=1, max_wait=0.1, max_digits=5000)
+    assert controller.estimate_cost(10) == 1, "Small requests cost one unit"
+    assert controller.estimate_cost(4000) == 2, "Big operands are capped at half the capacity"
+
+    # An expensive request fills the expensive share: another one waits, then is shed
+    with controller.admit(3000):
+        try:
+            with controller.admit(3000):
+                shed = False
+        except Overloaded as e:
+            shed = e.retry_after >= 1
+        assert shed, "Expensive request is shed when its share is used"
+        with controller.admit(10), controller.admit(10):
+            assert controller.stats()["in_use"] == 4, "Small requests still get the rest of the capacity"
+
+    # Fill the capacity and the queue, then check the web responses
+    controller = AdmissionController(capacity=1, max_queue=1, max_wait=5, max_digits=5000)
+    body = {"num1": "😁", "operation": "➕", "num2": "😃"}
+    previous, web.admission = web.admission, controller
+    responses = []
+    try:
+        client = web.app.test_client()
+        with controller.admit(10):
+            waiter = threading.Thread(target=lambda: responses.append(client.post("/calculate", json=body)))
+            waiter.start()
+            while controller.stats()["waiting"] < 1:
+                time.sleep(0.01)
+            response = client.post("/calculate", json=body)
+            assert response.status_code == 503 and int(response.headers["Retry-After"]) >= 1, "Full queue answers 503 with Retry-After"
+        waiter.join()
+        assert responses[0].status_code == 200 and responses[0].get_json()["result"] == "😆", "Queued request runs once capacity frees up"
+
+        response = client.post("/api/convert", json={"smiley": "😊" * 6000})
+        assert response.status_code == 413 and "too large" in response.get_json()["error"], "Operands beyond the digit limit get 413"
+
+        # With the default limit, the largest admitted operands still get a complete response
+        web.admission = AdmissionController()
+        operand = "😉" * (web.admission.max_digits // 2 - 1)
+        response = client.post("/calculate", json={"num1": operand, "operation": "✖️", "num2": operand})
+        calculation = response.get_json()["calculation"]
+        assert response.status_code == 200 and len(calculation["result_regular"]) == 2 * len(operand), "Request just under the default limit"
+    finally:
+        web.admission = previous
+
+
+def test_profiling():
+    """Test sampled request profiles and the protected /debug/profile endpoint."""
+    import os
+    import pstats
+    import subprocess
+    import tempfile
+
+    print("🧪 Testing profiling hooks...\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        script = (
+            "from app import app\n"
+            "client = app.test_client()\n"
+            "for _ in range(3):\n"
+            "    client.post('/calculate', json={'num1': '😁', 'operation': '➕', 'num2': '😃'})\n"
+            "print(client.get('/debug/profile?seconds=0.2').status_code)\n"
+            "print(client.get('/debug/profile?seconds=0.2', headers={'Authorization': 'Bearer wrong'}).status_code)\n"
+            "for mode in ('stacks', 'memory'):\n"
+            "    response = client.get(f'/debug/profile?mode={mode}&seconds=0.2', headers={'Authorization': 'Bearer s3cret'})\n"
+            "    print(response.status_code, response.headers['X-Profile-File'])\n"
+        )
+        environment = dict(os.environ, SMILEY_PROFILE="1", SMILEY_PROFILE_TOKEN="s3cret", SMILEY_PROFILE_DIR=directory, PYTHONIOENCODING="utf-8")
+        output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, encoding="utf-8", env=environment).stdout.split("\n")
+        profiles = [name for name in os.listdir(directory) if name.startswith("requests-")]
+        stats = pstats.Stats(os.path.join(directory, profiles[0])) if profiles else None
+
+        assert output[:2] == ["401", "401"], "Endpoint needs the token"
+        assert output[2].startswith("200 ") and output[2].endswith(".collapsed"), "Stack capture is written"
+        assert output[3].startswith("200 ") and output[3].endswith(".txt"), "Allocation capture is written"
+        assert stats is not None and any(function[2] == "calculate_detailed" for function in stats.stats), "Sampled requests are profiled"
+
+    from app import app
+
+    status = app.test_client().get("/debug/profile").status_code
+    assert status == 404, "/debug/profile is not installed when disabled"
+
+
+def test_load_generator():
+    """Test the load generator against the test client and an in-process server."""
+    print("🧪 Testing load generator...\n")
+
+    local = run_load(local_sender(), concurrency=4, duration=0.5, seed=7)
+    with in_process_server() as url:
+        served = run_load(http_sender(url), concurrency=4, duration=0.5, mix={"calculate": 1, "index": 1}, seed=7)
+
+    for report, name in ((local, "Test client"), (served, "In-process server")):
+        latency = report["latency_ms"]
+        assert (
+            latency["requests"] > 0
+            and latency["errors"] == 0
+            and report["throughput_rps"] > 0
+            and latency["p50"] <= latency["p90"] <= latency["p99"] <= latency["p999"] <= latency["max"]
+            and sum(route["requests"] for route in report["routes"].values()) == latency["requests"]
+        ), f"{name}: {latency['requests']} requests, {report['throughput_rps']} req/s, p99 {latency['p99']}ms"
+
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.0 and percentile([1.0, 2.0, 3.0, 4.0], 99.9) == 4.0, "Nearest-rank percentiles"
+
+
 if __name__ == "__main__":
     # Check if requests is available
     try:
@@ -86,4 +893,24 @@ if __name__ == "__main__":
         print("❌ 'requests' library not found. Install with: pip install requests")
         sys.exit(1)
 
+    if "--load" in sys.argv[1:]:
+        load_main()
+        sys.exit(0)
+
     test_web_calculator()
+    test_batch_endpoint()
+    test_evaluate_endpoint()
+    test_big_number_responses()
+    test_cache_endpoint()
+    test_alphabet_parameter()
+    test_stream_endpoint()
+    test_reduce_endpoint()
+    test_channel()
+    test_asgi_matches_flask()
+    test_metrics_endpoint()
+    test_profiling()
+    test_prerendered_pages()
+    test_history()
+    test_admission_control()
+    test_production_server()
+    test_load_generator()
@@ -0,0 +1,168 @@
+"""
+tokenizer.py
+Incremental tokenizer for streams of smiley calculations.
+Input arrives in chunks of bytes or text, which may end in the middle of a
+UTF-8 sequence, of a multi-code-point operator such as ✖️ or of a number;
+the tokenizer keeps that state between chunks instead of buffering records.
+Operators, the decimal point, parentheses and newlines are matched with a
+precompiled trie, and runs of digits with one precompiled character class.
+"""
+
+import codecs
+import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from expression import VARIATION_SELECTOR
+
+# Whitespace that separates tokens without producing one
+BLANKS = ' \t\r\f\v'
+
+
+class Token(NamedTuple):
+    """One token of a smiley stream.
+
+    kind is 'number', 'operator', 'decimal', '(', ')' or 'newline'. text is
+    the digits of a number or the symbol of anything else; operators are
+    given in their canonical form (✖️ also when sent without U+FE0F). offset
+    counts code points from the start of the stream; line and column are
+    1-based.
+    """
+    kind: str
+    text: str
+    offset: int
+    line: int
+    column: int
+
+
+# Trie node: (token kind or None, canonical symbol, children by next character)
+_Node = Tuple[Optional[str], str, Dict[str, '_Node']]
+
+
+def compile_symbols(symbols: Dict[str, Tuple[str, str]]) -> Dict[str, _Node]:
+    """Build a trie from {symbol: (kind, canonical symbol)}."""
+    nodes: Dict[str, list] = {}
+    for symbol, (kind, canonical) in symbols.items():
+        children = nodes
+        for index, char in enumerate(symbol):
+            node = children.setdefault(char, [None, '', {}])
+            if index == len(symbol) - 1:
+                node[0], node[1] = kind, canonical
+            children = node[2]
+
+    def freeze(children: Dict[str, list]) -> Dict[str, _Node]:
+        return {char: (kind, canonical, freeze(grandchildren)) for char, (kind, canonical, grandchildren) in children.items()}
+
+    return freeze(nodes)
+
+
+class SmileyTokenizer:
+    """Resumable tokenizer for the digits and operations of a SmileyCalculator."""
+
+    def __init__(self, calc):
+        """Compile the symbol trie and digit class for a calculator's alphabet and operations."""
+        symbols = {'.': ('decimal', '.'), '(': ('(', '('), ')': (')', ')'), '\n': ('newline', '\n')}
+        for symbol in calc.operations:
+            symbols[symbol] = ('operator', symbol)
+            if symbol.endswith(VARIATION_SELECTOR):
+                symbols.setdefault(symbol[:-len(VARIATION_SELECTOR)], ('operator', symbol))
+        self.trie = compile_symbols(symbols)
+        self.digits = frozenset(calc.numbers)
+        self.digit_run = re.compile('[' + ''.join(re.escape(digit) for digit in calc.numbers) + ']+')
+        self.blank_run = re.compile('[' + re.escape(BLANKS) + ']+')
+
+        self.offset = 0
+        self.line = 1
+        self.line_start = 0
+        self._decoder = None
+        self._pending = ''
+        self._number: List[str] = []
+        self._number_start: Tuple[int, int, int] = (0, 1, 1)
+
+    def feed(self, chunk: Union[str, bytes, bytearray, memoryview]) -> List[Token]:
+        """Tokenize the next chunk and return the tokens it completes.
+
+        Bytes are decoded as UTF-8 across chunk boundaries. A number, or a
+        symbol that a longer one could extend, is held until a later chunk
+        (or close) shows where it ends.
+        """
+        if isinstance(chunk, str):
+            if self._decoder is not None and self._decoder.getstate()[0]:
+                raise ValueError("Text chunk received in the middle of a UTF-8 sequence")
+            return self._scan(chunk, final=False)
+        if self._decoder is None:
+            self._decoder = codecs.getincrementaldecoder('utf-8')()
+        return self._scan(self._decoder.decode(chunk), final=False)
+
+    def close(self) -> List[Token]:
+        """End the stream and return the tokens still held back."""
+        text = self._decoder.decode(b'', final=True) if self._decoder is not None else ''
+        tokens = self._scan(text, final=True)
+        if self._number:
+            tokens.append(self._finish_number())
+        return tokens
+
+    def _scan(self, text: str, final: bool) -> List[Token]:
+        """Tokenize text following any held-back symbol prefix."""
+        if self._pending:
+            self.offset -= len(self._pending)
+            text, self._pending = self._pending + text, ''
+        tokens = []
+        digits, trie = self.digits, self.trie
+        base = self.offset
+        position, length = 0, len(text)
+
+        while position < length:
+            char = text[position]
+            if char in digits:
+                end = self.digit_run.match(text, position).end()
+                if not self._number:
+                    offset = base + position
+                    self._number_start = (offset, self.line, offset - self.line_start + 1)
+                self._number.append(text[position:end])
+                position = end
+                continue
+            if self._number:
+                tokens.append(self._finish_number())
+            if char in BLANKS:
+                position = self.blank_run.match(text, position).end()
+                continue
+
+            # Longest symbol starting here
+            node = trie.get(char)
+            end = position + 1
+            match = (node, end) if node is not None and node[0] else None
+            while node is not None and node[2] and end < length:
+                node = node[2].get(text[end])
+                end += 1
+                if node is not None and node[0]:
+                    match = (node, end)
+            if node is not None and node[2] and end == length and not final:
+                # The next chunk may extend the symbol
+                self._pending = text[position:]
+                break
+            offset = base + position
+            if match is None:
+                raise ValueError(f"Unknown symbol {char!r} at line {self.line}, column {offset - self.line_start + 1}")
+            (kind, canonical, _), end = match
+            tokens.append(Token(kind, canonical, offset, self.line, offset - self.line_start + 1))
+            if kind == 'newline':
+                self.line += 1
+                self.line_start = offset + 1
+            position = end
+
+        self.offset = base + length
+        return tokens
+
+    def _finish_number(self) -> Token:
+        """Return the number token collected so far."""
+        text = ''.join(self._number)
+        self._number = []
+        return Token('number', text, *self._number_start)
+
+
+def tokenize_chunks(chunks: Iterable[Union[str, bytes]], calc) -> Iterator[Token]:
+    """Yield the tokens of a stream given as an iterable of chunks."""
+    tokenizer = SmileyTokenizer(calc)
+    for chunk in chunks:
+        yield from tokenizer.feed(chunk)
+    yield from tokenizer.close()